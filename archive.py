@@ -0,0 +1,168 @@
+# Hot/cold tiering: completed tasks and old wellness entries move in batches to
+# tasks_archive / wellness_archive, keeping the hot tables and their indexes small.
+# Reads reach into the archive only when their date range starts before the archive horizon.
+# Usage: python archive.py [--sizes] [--vacuum]
+#   (no flags: archive once, run maintenance and print tier sizes; --vacuum converts an
+#    older database to incremental auto-vacuum with one full VACUUM)
+import datetime
+import json
+import logging
+import sys
+import threading
+
+import database
+from database import connection, init_db, write
+
+RETENTION_DAYS = {"tasks": 180, "wellness": 365}
+BATCH_SIZE = 500
+ARCHIVE_INTERVAL = 6 * 3600   # seconds between background archive + maintenance runs
+VACUUM_PAGES = 2000           # free pages returned to the filesystem per maintenance run
+
+log = logging.getLogger("archive")
+
+# Archive candidates older than :cutoff. Archived tasks are due before the horizon and archived
+# wellness entries are timestamped before it, which is what reads compare their range against.
+# The newest row always stays hot: without AUTOINCREMENT SQLite would hand its id out again.
+CANDIDATES = {
+    "tasks": ("SELECT id FROM tasks WHERE completed = 1 AND due_date < :cutoff "
+              "AND COALESCE(completed_at, due_date) < :cutoff AND id < (SELECT MAX(id) FROM tasks) "
+              "ORDER BY due_date LIMIT :limit"),
+    "wellness": ("SELECT id FROM wellness WHERE timestamp < :cutoff AND id < (SELECT MAX(id) FROM wellness) "
+                 "ORDER BY timestamp LIMIT :limit"),
+}
+
+def horizon(conn, table):
+    row = conn.execute("SELECT horizon FROM archive_state WHERE tbl=?", (table,)).fetchone()
+    return row[0] if row else None
+
+def reaches_archive(conn, table, start):
+    h = horizon(conn, table)
+    return h is not None and (start is None or start < h)
+
+def with_archive(conn, sql, start, *tables):
+    """Rewrite sql so each table that start reaches back into also reads its archive.
+
+    The archive is added as a CTE of the same name, so the query text is unchanged and
+    WHERE clauses are pushed down into both tiers' indexes. start=None means unbounded.
+    """
+    ctes = [f"{t} AS (SELECT * FROM main.{t} UNION ALL SELECT * FROM main.{t}_archive)"
+            for t in tables if reaches_archive(conn, t, start)]
+    if not ctes:
+        return sql
+    body = sql.lstrip()
+    if body[:4].lower() == "with":
+        return "WITH " + ", ".join(ctes) + ", " + body[4:].lstrip()
+    return "WITH " + ", ".join(ctes) + " " + body
+
+def cutoff(table, today=None):
+    today = today or datetime.date.today()
+    return (today - datetime.timedelta(days=RETENTION_DAYS[table])).isoformat()
+
+def _move_batch(conn, table, cut, limit):
+    ids = [r[0] for r in conn.execute(CANDIDATES[table], {"cutoff": cut, "limit": limit})]
+    if ids:
+        cols = ",".join(r[1] for r in conn.execute(f"PRAGMA table_info({table}_archive)"))
+        batch = json.dumps(ids)
+        conn.execute("INSERT INTO archive_guard VALUES (1)")
+        conn.execute(f"INSERT INTO {table}_archive({cols}) SELECT {cols} FROM {table} "
+                     "WHERE id IN (SELECT value FROM json_each(?))", (batch,))
+        conn.execute(f"DELETE FROM {table} WHERE id IN (SELECT value FROM json_each(?))", (batch,))
+        conn.execute("DELETE FROM archive_guard")
+    # the horizon moves in the same transaction as the rows, so reads never miss them
+    conn.execute("INSERT INTO archive_state VALUES (?, ?) ON CONFLICT(tbl) DO UPDATE SET "
+                 "horizon = max(horizon, excluded.horizon)", (table, cut))
+    return len(ids)
+
+def archive_table(table, cut=None, batch_size=BATCH_SIZE):
+    """Move every row older than the retention window, one short write per batch."""
+    cut = cut or cutoff(table)
+    moved = 0
+    while True:
+        n = write(_move_batch, table, cut, batch_size)
+        moved += n
+        if n < batch_size:
+            return moved
+
+def archive_all():
+    return {table: archive_table(table) for table in RETENTION_DAYS}
+
+def maintain(pages=VACUUM_PAGES):
+    # PRAGMA incremental_vacuum frees one page per step, so it runs as a script on a
+    # private connection rather than as a statement inside the group-commit queue
+    conn = database._open(database.DB_PATH)
+    try:
+        incremental = conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        conn.executescript((f"PRAGMA incremental_vacuum({int(pages)});" if incremental else "")
+                           + "PRAGMA optimize;")
+        return incremental
+    finally:
+        conn.close()
+
+def full_vacuum():
+    conn = database._open(database.DB_PATH)
+    try:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+def tier_sizes():
+    """{tier: {table: {"rows": n, "bytes": b}}}, bytes including the table's indexes."""
+    with connection() as conn:
+        owner = dict(conn.execute("SELECT name, tbl_name FROM sqlite_master WHERE type IN ('table','index')"))
+        try:
+            pages = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()  # full-scan
+        except database.sqlite3.OperationalError:
+            pages = []  # dbstat not compiled in; report rows only
+        size = {}
+        for name, nbytes in pages:
+            size[owner.get(name, name)] = size.get(owner.get(name, name), 0) + nbytes
+        tiers = {"hot": {}, "archive": {}}
+        for table in RETENTION_DAYS:
+            for tier, name in (("hot", table), ("archive", table + "_archive")):
+                rows = conn.execute(f"SELECT COUNT(*) FROM {name}").fetchone()[0]
+                tiers[tier][name] = {"rows": rows, "bytes": size.get(name)}
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        tiers["free_bytes"] = conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size
+    return tiers
+
+class Scheduler:
+    """Daemon thread running archive_all() and maintain() every interval seconds."""
+
+    def __init__(self, interval=ARCHIVE_INTERVAL):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="archiver", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                archive_all()
+                maintain()
+            except Exception:
+                log.exception("archive run failed")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+if __name__ == "__main__":
+    init_db()
+    if "--vacuum" in sys.argv:
+        full_vacuum()
+    elif "--sizes" not in sys.argv:
+        for table, moved in archive_all().items():
+            print(f"archived {moved} {table} rows (before {cutoff(table)})")
+        if not maintain():
+            print("auto_vacuum is not incremental; run once with --vacuum to enable it")
+    for tier, tables in tier_sizes().items():
+        if tier == "free_bytes":
+            print(f"free pages: {tables} bytes")
+            continue
+        for name, s in tables.items():
+            print(f"{tier:<8}{name:<18}{s['rows']:>10} rows  {s['bytes'] if s['bytes'] is not None else '?':>12} bytes")
+    database.shutdown()
@@ -0,0 +1,97 @@
+# Asyncio facade over the data modules, e.g. `await async_data.tasks.get_tasks(uid)`.
+# Reads run on a bounded reader pool and are interrupted in SQLite when the awaiting
+# task is cancelled (e.g. the user navigates away); reporting reads run on a read-only
+# snapshot connection instead of the main pool, and reads marked own_connections take
+# whatever connections they need themselves. Writes wait on the group-commit queue
+# from a separate pool so they never starve readers.
+import asyncio
+import functools
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import database
+
+READER_THREADS = 8
+WRITER_THREADS = 4
+
+_readers = ThreadPoolExecutor(READER_THREADS, thread_name_prefix="db-reader")
+_writers = ThreadPoolExecutor(WRITER_THREADS, thread_name_prefix="db-write")
+
+class _Read:
+    """Runs fn on one pinned pooled connection (or pins each one an own_connections fn takes)
+    so cancel() can interrupt its statement."""
+
+    def __init__(self, fn, args, kwargs):
+        self.fn, self.args, self.kwargs = fn, args, kwargs
+        self.conn = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        if self.cancelled:
+            raise asyncio.CancelledError()
+        if getattr(self.fn, "own_connections", False):
+            with database.pinned(self._pin):
+                return self.fn(*self.args, **self.kwargs)
+        opener = database.snapshot if getattr(self.fn, "reporting", False) else database.connection
+        with opener() as conn:
+            self._pin(conn)
+            try:
+                # nested connection() calls inside fn reuse this connection
+                return self.fn(*self.args, **self.kwargs)
+            finally:
+                self._pin(None)
+
+    def _pin(self, conn):
+        with self._lock:
+            if conn is not None and self.cancelled:
+                raise asyncio.CancelledError()
+            self.conn = conn
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled = True
+            if self.conn is not None:
+                self.conn.interrupt()
+
+async def read(fn, *args, **kwargs):
+    call = _Read(fn, args, kwargs)
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_readers, call)
+    except asyncio.CancelledError:
+        call.cancel()
+        raise
+
+async def write(fn, *args, **kwargs):
+    # not pinned to a connection: the write must go through the group-commit queue
+    return await asyncio.get_running_loop().run_in_executor(_writers, functools.partial(fn, *args, **kwargs))
+
+def _facade(module, reads=(), writes=()):
+    ns = {name: functools.partial(read, getattr(module, name)) for name in reads}
+    ns.update({name: functools.partial(write, getattr(module, name)) for name in writes})
+    return SimpleNamespace(**ns)
+
+# namespace -> (module, reads, writes); modules are imported on first access so that
+# importing this facade stays off the startup path
+FACADES = {
+    "tasks": ("tasks", ("get_tasks", "get_task"), ("create_task", "toggle_complete")),
+    "wellness": ("wellness", ("get_wellness", "get_notes"), ("log_wellness",)),
+    "rewards": ("rewards", ("get_balance", "list_rewards", "get_ledger", "get_leaderboard"),
+                ("earn_points", "redeem_reward", "add_reward")),
+    "team": ("team", ("get_team_members", "get_available_employees"), ("create_team", "edit_team", "delete_team")),
+    "feedback": ("feedback", ("get_feedback", "search_feedback", "get_messages", "with_messages"), ("submit_feedback",)),
+    "training": ("training", ("list_resources", "search_resources"), ("add_resource",)),
+    "stats": ("stats", ("get_user_stats",), ()),
+    "wellness_trends": ("wellness_trends", ("stress_trend", "get_rollups"), ()),
+    "evaluation": ("evaluation", ("team_scorecard", "company_scorecards"), ()),
+    "wellness_analytics": ("wellness_analytics", ("get_scores", "get_team_scores"), ("refresh_scores",)),
+}
+
+def __getattr__(name):
+    if name not in FACADES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module, reads, writes = FACADES[name]
+    ns = globals()[name] = _facade(importlib.import_module(module), reads, writes)
+    return ns
@@ -1,37 +1,63 @@
-import flet as ft
 import re
-from passlib.hash import bcrypt
-from database import get_conn
+from concurrent.futures import Future
+import events
+from auth_pool import chain, get_pool
+from database import connection, submit_write
+from sessions import SESSIONS
 from ui_utils import validate_username, validate_password
 
-SESSIONS = {}
+USER_FIELDS = ("id", "username", "role", "team_id")
 
-def signup(username: str, password: str, role: str):
+def signup_async(username: str, password: str, role: str) -> Future:
     if not validate_username(username) or not validate_password(password):
         raise ValueError("Invalid credentials format")
-    pw_hash = bcrypt.hash(password)
-    conn = get_conn(); c = conn.cursor()
-    c.execute("INSERT INTO users(username,password_hash,role) VALUES(?,?,?)", (username,pw_hash,role))
-    uid = c.lastrowid
-    c.execute("INSERT INTO points(user_id) VALUES(?)", (uid,))
-    conn.commit(); conn.close()
-    return uid
+    def insert(conn, pw_hash):
+        c = conn.cursor()
+        c.execute("INSERT INTO users(username,password_hash,role) VALUES(?,?,?)", (username,pw_hash,role))
+        uid = c.lastrowid
+        c.execute("INSERT INTO points(user_id) VALUES(?)", (uid,))
+        return uid
+    def created(uid):
+        events.publish(events.UserCreated(uid))
+        return uid
+    # the hash worker only queues the insert; the event follows its commit
+    return chain(get_pool().hash(password), lambda pw_hash: chain(submit_write(insert, pw_hash), created))
+
+def login_async(username: str, password: str) -> Future:
+    with connection() as conn:
+        user = conn.execute("SELECT * FROM users WHERE username=?", (username,)).fetchone()
+    if not user:
+        fut = Future(); fut.set_result(None)
+        return fut
+    def start_session(result):
+        ok, new_hash = result
+        if not ok:
+            return None
+        if new_hash:
+            # bcrypt cost changed since this password was stored; upgrade it transparently.
+            # Queued without waiting: the old hash still verifies, so a lost upgrade is redone next login
+            submit_write(lambda conn: conn.execute("UPDATE users SET password_hash=? WHERE id=?", (new_hash, user['id'])))
+        return SESSIONS.create(user['id'], {k: user[k] for k in USER_FIELDS})
+    return chain(get_pool().verify(password, user['password_hash']), start_session)
+
+def signup(username: str, password: str, role: str):
+    return signup_async(username, password, role).result()
 
 def login(username: str, password: str):
-    conn = get_conn(); c=conn.cursor()
-    c.execute("SELECT * FROM users WHERE username=?", (username,))
-    user = c.fetchone(); conn.close()
-    if not user or not bcrypt.verify(password,user['password_hash']):
-        return None
-    # create session token
-    token = bcrypt.hash(f"{username}{ft.time.time()}")
-    SESSIONS[token] = user['id']
-    return token
+    return login_async(username, password).result()
 
 def get_user(token: str):
-    uid = SESSIONS.get(token)
-    if not uid: return None
-    conn = get_conn(); c=conn.cursor()
-    c.execute("SELECT id,username,role,team_id FROM users WHERE id=?",(uid,))
-    user = c.fetchone(); conn.close()
-    return user
\ No newline at end of file
+    session = SESSIONS.get(token)
+    if not session: return None
+    uid, user = session
+    if user is None:
+        with connection() as conn:
+            row = conn.execute("SELECT id,username,role,team_id FROM users WHERE id=?",(uid,)).fetchone()
+        if not row:
+            SESSIONS.revoke(token); return None
+        user = dict(row)
+        SESSIONS.cache_row(token, user)
+    return user
+
+def logout(token: str):
+    SESSIONS.revoke(token)
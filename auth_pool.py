@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", "12"))
+AUTH_WORKERS = int(os.environ.get("AUTH_WORKERS", os.cpu_count() or 1))
+AUTH_EXECUTOR = os.environ.get("AUTH_EXECUTOR", "thread")   # "thread" or "process"
+
+# Worker functions live at module level so process pools can pickle them.
+# passlib (and its bcrypt backend) is imported on first use to keep it off the startup path.
+def _hash(password, rounds):
+    from passlib.hash import bcrypt
+    return bcrypt.using(rounds=rounds).hash(password)
+
+def _verify(password, pw_hash, rounds):
+    """Return (ok, new_hash); new_hash is set when the stored hash used another cost."""
+    from passlib.hash import bcrypt
+    if not bcrypt.verify(password, pw_hash):
+        return False, None
+    hasher = bcrypt.using(rounds=rounds)
+    return True, (hasher.hash(password) if hasher.needs_update(pw_hash) else None)
+
+def _settle(out, f):
+    if f.exception() is not None:
+        out.set_exception(f.exception())
+    else:
+        out.set_result(f.result())
+
+def chain(future, fn) -> Future:
+    """Future resolving to fn(future.result()); fn runs in the completing thread, so it must not
+    block. If fn returns a Future (e.g. a queued write) the result is taken from it when it's done."""
+    out = Future()
+    def done(f):
+        try:
+            result = fn(f.result())
+        except BaseException as e:
+            out.set_exception(e)
+            return
+        if isinstance(result, Future):
+            result.add_done_callback(lambda r: _settle(out, r))
+        else:
+            out.set_result(result)
+    future.add_done_callback(done)
+    return out
+
+class AuthPool:
+    """Runs bcrypt hashing/verification off the UI thread and tracks throughput."""
+
+    def __init__(self, workers=AUTH_WORKERS, rounds=BCRYPT_ROUNDS, kind=AUTH_EXECUTOR):
+        self.rounds = rounds
+        self.workers = workers
+        self.kind = kind
+        executor = ProcessPoolExecutor if kind == "process" else ThreadPoolExecutor
+        self._executor = executor(max_workers=workers)
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._submitted = self._completed = self._failed = self._rehashed = 0
+        self._busy = 0.0
+
+    def _submit(self, fn, *args) -> Future:
+        with self._lock:
+            self._submitted += 1
+        t0 = time.perf_counter()
+        fut = self._executor.submit(fn, *args)
+        def done(f):
+            with self._lock:
+                self._busy += time.perf_counter() - t0
+                if f.exception() is not None:
+                    self._failed += 1
+                else:
+                    self._completed += 1
+                    if fn is _verify and f.result()[1] is not None:
+                        self._rehashed += 1
+        fut.add_done_callback(done)
+        return fut
+
+    def hash(self, password) -> Future:
+        return self._submit(_hash, password, self.rounds)
+
+    def verify(self, password, pw_hash) -> Future:
+        return self._submit(_verify, password, pw_hash, self.rounds)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            elapsed = time.perf_counter() - self._started
+            done = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "executor": self.kind,
+                "rounds": self.rounds,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "in_flight": self._submitted - done,
+                "rehashed": self._rehashed,
+                "ops_per_sec": done / elapsed if elapsed else 0.0,
+                "avg_latency_ms": 1000 * self._busy / done if done else 0.0,
+            }
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> AuthPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = AuthPool()
+        return _pool
+
+def configure(**kwargs) -> AuthPool:
+    """Replace the shared pool, e.g. configure(workers=4, rounds=13, kind="process")."""
+    global _pool
+    with _pool_lock:
+        old, _pool = _pool, AuthPool(**kwargs)
+    if old is not None:
+        old.shutdown(wait=False)
+    return _pool
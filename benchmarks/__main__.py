@@ -0,0 +1,114 @@
+# Benchmark suite: python -m benchmarks [--scale 10k|100k|1m] [--out results.json] [--baseline base.json]
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import auth_pool
+import database
+import encryption
+from benchmarks import datagen
+from benchmarks.scenarios import SCENARIOS
+
+def percentile(ordered, p):
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+def measure(op, iterations, warmup=5):
+    for _ in range(warmup):
+        op()
+    samples = []
+    tracemalloc.start()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        op()
+        samples.append(time.perf_counter() - start)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    samples.sort()
+    return {
+        "iterations": iterations,
+        "mean_ms": 1000 * sum(samples) / len(samples),
+        "p50_ms": 1000 * percentile(samples, 0.50),
+        "p95_ms": 1000 * percentile(samples, 0.95),
+        "p99_ms": 1000 * percentile(samples, 0.99),
+        "peak_kb": peak / 1024,
+    }
+
+def compare(results, baseline, tolerance):
+    """Print per-scenario p95 ratios against baseline; returns the regressed scenario names."""
+    regressed = []
+    print(f"\n{'scenario':<26}{'base p95':>10}{'now p95':>10}{'ratio':>8}")
+    for name, now in results["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if not base:
+            continue
+        ratio = now["p95_ms"] / base["p95_ms"] if base["p95_ms"] else float("inf")
+        flag = "  REGRESSION" if ratio > tolerance else ""
+        print(f"{name:<26}{base['p95_ms']:>10.2f}{now['p95_ms']:>10.2f}{ratio:>7.2f}x{flag}")
+        if flag:
+            regressed.append(name)
+    return regressed
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m benchmarks")
+    ap.add_argument("--scale", choices=sorted(datagen.SCALES), default="10k")
+    ap.add_argument("--iterations", type=int, default=200)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--only", nargs="*", choices=sorted(SCENARIOS), help="run a subset of scenarios")
+    ap.add_argument("--db", help="reuse (or create) the generated database at this path")
+    ap.add_argument("--out", help="write results as JSON")
+    ap.add_argument("--baseline", help="compare against a saved results JSON")
+    ap.add_argument("--tolerance", type=float, default=1.2, help="p95 ratio that counts as a regression")
+    args = ap.parse_args(argv)
+
+    tmp = None
+    if args.db:
+        database.DB_PATH = args.db
+        encryption.KEY_PATH = args.db + ".key"
+        encryption.SEARCH_KEY_PATH = args.db + ".search.key"
+        fresh = not os.path.exists(args.db)
+    else:
+        tmp = tempfile.TemporaryDirectory()
+        database.DB_PATH = os.path.join(tmp.name, "bench.db")
+        encryption.KEY_PATH = os.path.join(tmp.name, "bench.key")
+        encryption.SEARCH_KEY_PATH = os.path.join(tmp.name, "search.key")
+        fresh = True
+    auth_pool.configure(rounds=datagen.BCRYPT_ROUNDS)
+    database.init_db()
+    start = time.perf_counter()
+    counts = datagen.plan(datagen.SCALES[args.scale])
+    if fresh:
+        counts = datagen.generate(datagen.SCALES[args.scale], args.seed)
+        print(f"generated {args.scale} dataset in {time.perf_counter() - start:.1f}s: {counts}")
+
+    results = {
+        "scale": args.scale, "seed": args.seed, "counts": counts,
+        "python": platform.python_version(), "sqlite": database.sqlite3.sqlite_version,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "scenarios": {},
+    }
+    print(f"{'scenario':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'peak KiB':>10}")
+    for name in args.only or SCENARIOS:
+        rng = random.Random(args.seed)
+        iterations = max(10, args.iterations // 10) if name == "login" else args.iterations
+        r = results["scenarios"][name] = measure(SCENARIOS[name](counts, rng), iterations)
+        print(f"{name:<26}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}{r['peak_kb']:>10.0f}")
+
+    database.shutdown()
+    if tmp:
+        tmp.cleanup()
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            if compare(results, json.load(f), args.tolerance):
+                return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
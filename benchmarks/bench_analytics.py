@@ -0,0 +1,71 @@
+# Scaling of the vectorized burnout scoring. compute() runs on synthetic columns of growing
+# size; a flat ns/row column means cost is linear in wellness rows. The end-to-end pass
+# (bulk load from SQLite, compute, store scores) runs on seeded databases.
+# Usage: python -m benchmarks.bench_analytics [--sizes 1000000,2000000,4000000] [--db-rows 100000,200000]
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+import database
+import wellness_analytics
+from database import connection, init_db
+
+ENTRIES_PER_USER = 200
+WINDOW = wellness_analytics.WINDOW_DAYS
+
+def synthetic(rows, rng):
+    users = max(1, rows // ENTRIES_PER_USER)
+    return (rng.integers(1, users + 1, rows), rng.uniform(0, WINDOW, rows),
+            rng.integers(1, 11, rows).astype(np.float64))
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def seed(rows, as_of, rng):
+    end = datetime.datetime.fromisoformat(as_of) + datetime.timedelta(days=1)
+    users = max(1, rows // ENTRIES_PER_USER)
+    with connection() as conn:
+        conn.executemany("INSERT INTO users(id,username,password_hash,role,team_id) VALUES(?,?,?,?,?)",
+                         ((u, f"u{u}", "x", "user", u % 50 + 1) for u in range(1, users + 1)))
+        conn.executemany("INSERT INTO wellness(user_id,timestamp,stress_level) VALUES(?,?,?)", (
+            (rng.randint(1, users), (end - datetime.timedelta(seconds=rng.randrange(WINDOW * 86400))).strftime("%Y-%m-%d %H:%M:%S"),
+             rng.randint(1, 10)) for _ in range(rows)))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000000,2000000,4000000,8000000")
+    ap.add_argument("--db-rows", default="50000,100000,200000")
+    args = ap.parse_args()
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>10}{'users':>8}{'compute ms':>12}{'ns/row':>8}")
+    for rows in map(int, args.sizes.split(",")):
+        cols = synthetic(rows, rng)
+        t = best_of(lambda: wellness_analytics.compute(*cols, WINDOW))
+        print(f"{rows:>10}{rows // ENTRIES_PER_USER:>8}{1000 * t:>12.1f}{1e9 * t / rows:>8.1f}")
+    as_of = "2026-01-31"
+    print(f"\n{'rows':>10}{'load ms':>10}{'refresh ms':>12}{'ns/row':>8}")
+    for rows in map(int, args.db_rows.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_PATH = os.path.join(tmp, "bench.db")
+            init_db(); seed(rows, as_of, random.Random(0))
+            since = (datetime.date.fromisoformat(as_of) + datetime.timedelta(days=1 - WINDOW)).isoformat()
+            def load():
+                with connection() as conn:
+                    wellness_analytics.load(conn, since, "2026-02-01")
+            t_load = best_of(load)
+            t = best_of(lambda: wellness_analytics.refresh_scores(as_of))
+            print(f"{rows:>10}{1000 * t_load:>10.1f}{1000 * t:>12.1f}{1e9 * t / rows:>8.1f}")
+            database.shutdown()
+
+if __name__ == "__main__":
+    main()
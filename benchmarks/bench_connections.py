@@ -0,0 +1,60 @@
+# Compare ops/sec of per-call sqlite3.connect against the pooled connection layer.
+# Usage: python -m benchmarks.bench_connections [--ops N] [--threads T]
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+from database import connection, get_conn, init_db
+
+def legacy_read(uid):
+    conn = get_conn(); c = conn.cursor()
+    c.execute("SELECT * FROM tasks WHERE assigned_to=?", (uid,))
+    rows = c.fetchall(); conn.close()
+    return rows
+
+def legacy_write(uid):
+    conn = get_conn(); c = conn.cursor()
+    c.execute("UPDATE tasks SET completed=1-completed WHERE id=? AND assigned_to=?", (uid, uid))
+    conn.commit(); conn.close()
+
+def pooled_read(uid):
+    with connection() as conn:
+        return conn.execute("SELECT * FROM tasks WHERE assigned_to=?", (uid,)).fetchall()
+
+def pooled_write(uid):
+    with connection() as conn:
+        conn.execute("UPDATE tasks SET completed=1-completed WHERE id=? AND assigned_to=?", (uid, uid))
+
+def seed(users=100, tasks_per_user=20):
+    with connection() as conn:
+        conn.executemany(
+            "INSERT INTO tasks(title,assigned_to,type) VALUES(?,?,'task')",
+            [(f"task {i}", i % users + 1) for i in range(users * tasks_per_user)],
+        )
+
+def run(fn, ops, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(fn, (i % 100 + 1 for i in range(ops))))
+    return ops / (time.perf_counter() - start)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ops", type=int, default=5000)
+    ap.add_argument("--threads", type=int, default=4)
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        init_db(); seed()
+        print(f"{'scenario':<16}{'per-call ops/s':>16}{'pooled ops/s':>16}{'speedup':>10}")
+        for name, legacy, pooled in [("read", legacy_read, pooled_read), ("write", legacy_write, pooled_write)]:
+            a = run(legacy, args.ops, args.threads)
+            b = run(pooled, args.ops, args.threads)
+            print(f"{name:<16}{a:>16.0f}{b:>16.0f}{b / a:>9.1f}x")
+        database.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Cost of encrypted feedback messages on the manager's feedback listing. A page is fetched as
+# metadata and only its 20 bodies are decrypted; "cold" clears the decrypt LRU first, "warm"
+# re-shows the same page. "bodies, no decrypt" fetches the page and its stored bodies in one query,
+# i.e. what the listing cost before messages were encrypted.
+# Bulk rows compare decrypting inline against batches on the decrypt pool (needs several cores).
+# Usage: python -m benchmarks.bench_encryption [--rows N] [--pages N] [--bulk N]
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import database
+import encryption
+import feedback
+from database import connection, init_db, write
+
+WORDS = "deploy pipeline sprint planning meeting review release onboarding workload burnout".split()
+
+def seed(rows, rng):
+    write(feedback.insert_feedback, [(rng.randint(1, 500), " ".join(rng.choices(WORDS, k=20)), None)
+                                     for _ in range(rows)])
+
+def bodies_page(offset):
+    with connection() as conn:
+        rows = conn.execute("SELECT id,message,timestamp FROM feedback ORDER BY timestamp DESC LIMIT 20 OFFSET ?",
+                            (offset,)).fetchall()
+    return [(r[0], r[1], r[2]) for r in rows]
+
+def timed(fn, args, before=None):
+    total = 0.0
+    for a in args:
+        if before:
+            before()
+        start = time.perf_counter()
+        fn(a)
+        total += time.perf_counter() - start
+    return 1000 * total / len(args)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--bulk", type=int, default=10_000)
+    args = ap.parse_args()
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        encryption.KEY_PATH = os.path.join(tmp, "bench.key")
+        encryption.SEARCH_KEY_PATH = os.path.join(tmp, "search.key")
+        init_db(); seed(args.rows, rng)
+        offsets = [20 * rng.randrange(args.rows // 20) for _ in range(args.pages)]
+        listing = lambda o: feedback.with_messages(feedback.get_feedback(20, o))
+        print(f"{args.rows} feedback rows; mean ms per page of 20")
+        print(f"{'metadata only':<22}{timed(lambda o: feedback.get_feedback(20, o), offsets):>8.3f}")
+        print(f"{'bodies, no decrypt':<22}{timed(bodies_page, offsets):>8.3f}")
+        print(f"{'decrypted, cold':<22}{timed(listing, offsets, encryption._decrypt_cached.cache_clear):>8.3f}")
+        listing(offsets[0])
+        print(f"{'decrypted, warm':<22}{timed(listing, offsets[:1] * len(offsets)):>8.3f}")
+        with connection() as conn:
+            tokens = [r[0] for r in conn.execute("SELECT message FROM feedback LIMIT ?", (args.bulk,))]
+        inline = timed(lambda t: encryption._decrypt_chunk(t, False), [tokens])
+        pooled = timed(lambda t: encryption.decrypt_many(t, cache=False), [tokens])
+        print(f"\nbulk decrypt of {len(tokens)} ({os.cpu_count()} cpus): inline {inline:.1f} ms, "
+              f"pool of {encryption.DECRYPT_WORKERS} {pooled:.1f} ms ({1000 * pooled / len(tokens):.1f} us/row)")
+        database.shutdown()
+
+if __name__ == "__main__":
+    main()
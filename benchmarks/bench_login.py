@@ -0,0 +1,51 @@
+# Load test: concurrent login throughput as the auth worker pool grows.
+# Usage: python -m benchmarks.bench_login [--users N] [--logins N] [--rounds R] [--executor thread|process]
+import argparse
+import os
+import tempfile
+import time
+
+import auth
+import auth_pool
+import database
+from database import connection, init_db
+
+PASSWORD = "Bench\\Pass1"
+
+def seed(users, rounds):
+    pw_hash = auth_pool._hash(PASSWORD, rounds)
+    with connection() as conn:
+        conn.executemany(
+            "INSERT INTO users(username,password_hash,role) VALUES(?,?,'user')",
+            [(f"benchuser{i:05d}", pw_hash) for i in range(users)],
+        )
+
+def run(users, logins):
+    start = time.perf_counter()
+    futures = [auth.login_async(f"benchuser{i % users:05d}", PASSWORD) for i in range(logins)]
+    assert all(f.result() for f in futures), "login failed"
+    return logins / (time.perf_counter() - start)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--logins", type=int, default=200)
+    ap.add_argument("--rounds", type=int, default=10)
+    ap.add_argument("--executor", choices=["thread", "process"], default="thread")
+    args = ap.parse_args()
+    cores = os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        init_db(); seed(args.users, args.rounds)
+        print(f"{'workers':>8}{'logins/s':>12}{'scaling':>10}")
+        base = None
+        for workers in sorted({1, cores} | {2 ** i for i in range(cores.bit_length())}):
+            pool = auth_pool.configure(workers=workers, rounds=args.rounds, kind=args.executor)
+            rate = run(args.users, args.logins)
+            base = base or rate
+            print(f"{workers:>8}{rate:>12.1f}{rate / base:>9.2f}x")
+            pool.shutdown()
+        database.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Mixed load: writer threads log wellness entries while report threads run heavy manager
+# reports (every user's summary recomputed from scratch plus a scorecard per team, all in one
+# snapshot). Writer latency should barely move in WAL mode; with a rollback journal each
+# commit waits for the running reports to drop their read locks.
+# Usage: python -m benchmarks.bench_reporting [--writers N] [--writes N] [--reporters N] [--journal wal,delete]
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+import encryption
+import evaluation
+import stats
+import wellness
+from database import connection, init_db, reporting
+
+START, END = "2024-01-01", "2025-12-31"
+
+def seed(users, teams, rows, rng):
+    span = 2 * 365 * 86400
+    start = time.mktime(time.strptime(START, "%Y-%m-%d"))
+    stamp = lambda: time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + rng.randrange(span)))
+    with connection() as conn:
+        conn.executemany("INSERT INTO teams(id,name,max_members) VALUES(?,?,?)", ((t, f"t{t}", users) for t in range(1, teams + 1)))
+        conn.executemany("INSERT INTO users(id,username,password_hash,role,team_id) VALUES(?,?,?,?,?)",
+                         ((u, f"u{u}", "x", "user", u % teams + 1) for u in range(1, users + 1)))
+        conn.executemany("INSERT INTO tasks(title,assigned_to,completed,type,due_date) VALUES(?,?,?,?,?)",
+                         ((f"t{i}", rng.randint(1, users), rng.random() < 0.6, "task", stamp()[:10]) for i in range(rows)))
+        conn.executemany("INSERT INTO wellness(user_id,timestamp,stress_level,workload) VALUES(?,?,?,?)",
+                         ((rng.randint(1, users), stamp(), rng.randint(1, 10), "medium") for _ in range(rows)))
+
+@reporting
+def heavy_report(teams):
+    with connection() as conn:
+        totals = conn.execute(stats._source(conn)).fetchall()
+    with evaluation._lock:
+        evaluation._cache.clear()
+    return len(totals), [evaluation.team_scorecard(t, START, END) for t in range(1, teams + 1)]
+
+def percentile(sorted_ms, p):
+    return sorted_ms[min(len(sorted_ms) - 1, int(p / 100 * len(sorted_ms)))]
+
+def writers(n, writes, users, rng):
+    latencies, errors = [], [0]
+    def work(_):
+        for _ in range(writes):
+            start = time.perf_counter()
+            try:
+                wellness.log_wellness(rng.randint(1, users), rng.randint(1, 10), "medium", None)
+            except Exception:
+                errors[0] += 1
+            latencies.append(1000 * (time.perf_counter() - start))
+    start = time.perf_counter()
+    with ThreadPoolExecutor(n) as pool:
+        list(pool.map(work, range(n)))
+    return sorted(latencies), errors[0], n * writes / (time.perf_counter() - start)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=2000)
+    ap.add_argument("--teams", type=int, default=40)
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--writers", type=int, default=4)
+    ap.add_argument("--writes", type=int, default=300, help="writes per writer thread")
+    ap.add_argument("--reporters", type=int, default=2)
+    ap.add_argument("--journal", default="wal,delete")
+    args = ap.parse_args()
+    base = database.PRAGMAS
+    print(f"{'journal':<9}{'load':<10}{'writes/s':>9}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'max ms':>8}{'errors':>7}{'reports':>8}")
+    for journal in args.journal.split(","):
+        database.PRAGMAS = tuple((k, journal.upper() if k == "journal_mode" else v) for k, v in base)
+        with tempfile.TemporaryDirectory() as tmp:
+            database.DB_PATH = os.path.join(tmp, "bench.db")
+            encryption.KEY_PATH = os.path.join(tmp, "bench.key")
+            encryption.SEARCH_KEY_PATH = os.path.join(tmp, "search.key")
+            init_db(); seed(args.users, args.teams, args.rows, random.Random(0))
+            for load in ("writes", "+reports"):
+                stop, reports = threading.Event(), [0]
+                def report_loop():
+                    while not stop.is_set():
+                        heavy_report(args.teams)
+                        reports[0] += 1
+                threads = [threading.Thread(target=report_loop) for _ in range(args.reporters if load == "+reports" else 0)]
+                for t in threads:
+                    t.start()
+                lat, errors, rate = writers(args.writers, args.writes, args.users, random.Random(1))
+                stop.set()
+                for t in threads:
+                    t.join()
+                print(f"{journal:<9}{load:<10}{rate:>9.0f}{percentile(lat, 50):>8.1f}{percentile(lat, 95):>8.1f}"
+                      f"{percentile(lat, 99):>8.1f}{lat[-1]:>8.1f}{errors:>7}{reports[0]:>8}")
+            database.shutdown()
+    database.PRAGMAS = base
+
+if __name__ == "__main__":
+    main()
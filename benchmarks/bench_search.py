@@ -0,0 +1,63 @@
+# FTS5 MATCH versus LIKE '%term%' scans over feedback messages.
+# LIKE returns its first 20 hits unordered; ranked FTS scores every match, so very common
+# words cost more there, while selective terms are where the index wins.
+# Usage: python -m benchmarks.bench_search [--rows N] [--queries N]
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import database
+import encryption
+import feedback
+from database import connection, init_db
+
+WORDS = ("deploy pipeline sprint planning meeting review release onboarding workload burnout "
+         "manager team process tooling documentation testing incident retro roadmap budget").split()
+
+def seed(rows, rng):
+    # LIKE can only search plaintext, so seed legacy unencrypted rows and index them by hand
+    messages = [" ".join(rng.choices(WORDS, k=12)) + f" ticket{i}" for i in range(rows)]
+    with connection() as conn:
+        conn.executemany("INSERT INTO feedback(id,from_user,message) VALUES(?,?,?)",
+                         ((i, rng.randint(1, 500), m) for i, m in enumerate(messages, 1)))
+        conn.executemany("INSERT INTO feedback_fts(rowid,message) VALUES(?,?)",
+                         ((i, encryption.blind_terms(m)) for i, m in enumerate(messages, 1)))
+
+def like_search(text, limit=20, offset=0):
+    with connection() as conn:
+        return conn.execute("SELECT id,message,timestamp FROM feedback WHERE message LIKE ? LIMIT ? OFFSET ?",  # full-scan
+                            (f"%{text}%", limit, offset)).fetchall()
+
+def timed(fn, terms):
+    start = time.perf_counter()
+    for t in terms:
+        fn(t)
+    return 1000 * (time.perf_counter() - start) / len(terms)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        encryption.KEY_PATH = os.path.join(tmp, "bench.key")
+        encryption.SEARCH_KEY_PATH = os.path.join(tmp, "search.key")
+        init_db(); seed(args.rows, rng)
+        # rare terms (one ticket each) are LIKE's worst case: no early LIMIT exit
+        cases = {"common word": [rng.choice(WORDS) for _ in range(args.queries)],
+                 "rare term": [f"ticket{rng.randrange(args.rows)}" for _ in range(args.queries)],
+                 "prefix": [rng.choice(WORDS)[:4] for _ in range(args.queries)]}
+        print(f"{args.rows} feedback rows; mean ms per query (first page of 20)")
+        print(f"{'query':<14}{'LIKE':>10}{'FTS newest':>12}{'FTS ranked':>12}")
+        newest = lambda t: feedback.search_feedback(t, ranked=False)
+        for name, terms in cases.items():
+            print(f"{name:<14}{timed(like_search, terms):>10.2f}{timed(newest, terms):>12.2f}"
+                  f"{timed(feedback.search_feedback, terms):>12.2f}")
+        database.shutdown()
+
+if __name__ == "__main__":
+    main()
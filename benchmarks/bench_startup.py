@@ -0,0 +1,79 @@
+# Cold start to the login screen: each run is a fresh interpreter that imports the app
+# entry module and runs init_db on an up-to-date database, under -X importtime.
+# Time to first frame is measured from process launch until the login screen could render.
+# Usage: python -m benchmarks.bench_startup [--runs N] [--module page_factories] [--top N] [--out startup.json]
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# modules that should only load on first navigation or first use, never for the login screen
+DEFERRED = ("dashboard", "tasks", "wellness", "rewards", "team", "feedback", "training", "evaluation",
+            "leaderboard", "wellness_trends", "encryption", "cryptography", "passlib")
+
+CHILD = """
+import time
+start = time.perf_counter()
+import database, {module}
+database.DB_PATH = {db!r}
+database.init_db()
+print(time.time(), time.perf_counter() - start)
+"""
+
+def parse_importtime(stderr):
+    # "import time: self [us] | cumulative | imported package"
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        imports.append((name.strip(), int(self_us), int(cum_us)))
+    return imports
+
+def run_once(module, db):
+    launched = time.time()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD.format(module=module, db=db)],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode:
+        sys.exit(proc.stderr.strip().splitlines()[-1])
+    ready, in_process = map(float, proc.stdout.split())
+    return ready - launched, in_process, parse_importtime(proc.stderr)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=10)
+    ap.add_argument("--module", default="page_factories")
+    ap.add_argument("--top", type=int, default=15)
+    ap.add_argument("--out")
+    args = ap.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        run_once(args.module, db)  # migrates; every measured run sees a current schema
+        runs = [run_once(args.module, db) for _ in range(args.runs)]
+    first_frame = statistics.median(r[0] for r in runs)
+    in_process = statistics.median(r[1] for r in runs)
+    imports = runs[-1][2]
+    loaded = {name for name, _, _ in imports}
+    eager = [m for m in DEFERRED if m in loaded]
+    print(f"{args.module}: median of {args.runs} cold starts")
+    print(f"  time to first frame   {1000 * first_frame:8.1f} ms")
+    print(f"  imports + init_db     {1000 * in_process:8.1f} ms")
+    print(f"  modules imported      {len(imports):8d}  ({sum(s for _, s, _ in imports) / 1000:.1f} ms self time)")
+    print(f"  deferred but loaded   {', '.join(eager) or 'none'}")
+    print(f"top {args.top} imports by cumulative time (ms):")
+    for name, _, cum in sorted(imports, key=lambda r: -r[2])[:args.top]:
+        print(f"  {cum / 1000:8.1f}  {name}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"module": args.module, "runs": args.runs, "first_frame_ms": 1000 * first_frame,
+                       "in_process_ms": 1000 * in_process, "eager_deferred": eager,
+                       "imports": [{"module": n, "self_us": s, "cumulative_us": c} for n, s, c in imports]}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
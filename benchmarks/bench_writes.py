@@ -0,0 +1,52 @@
+# Write throughput: one commit per call versus the group-commit write queue.
+# Usage: python -m benchmarks.bench_writes [--ops N] [--threads T] [--synchronous NORMAL|FULL]
+# Group commit pays off most when every commit is an fsync (synchronous=FULL).
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+from database import connection, get_conn, init_db, write
+
+INSERT = "INSERT INTO tasks(title,assigned_to,type) VALUES(?,?,'task')"
+
+def per_call(i):
+    conn = get_conn(); c = conn.cursor()
+    c.execute(f"PRAGMA synchronous={dict(database.PRAGMAS)['synchronous']}")
+    c.execute(INSERT, (f"task {i}", i % 100 + 1))
+    conn.commit(); conn.close()
+
+def pooled_commit(i):
+    with connection() as conn:
+        conn.execute(INSERT, (f"task {i}", i % 100 + 1))
+
+def group_commit(i):
+    write(lambda conn: conn.execute(INSERT, (f"task {i}", i % 100 + 1)))
+
+def run(fn, ops, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        list(pool.map(fn, range(ops)))
+    return ops / (time.perf_counter() - start)
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ops", type=int, default=5000)
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--synchronous", choices=["OFF", "NORMAL", "FULL"], default="FULL")
+    args = ap.parse_args()
+    database.PRAGMAS = tuple((k, args.synchronous if k == "synchronous" else v) for k, v in database.PRAGMAS)
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "bench.db")
+        init_db()
+        print(f"{'mode':<20}{'writes/s':>12}")
+        for name, fn in [("per-call commit", per_call), ("pooled commit", pooled_commit), ("group commit", group_commit)]:
+            print(f"{name:<20}{run(fn, args.ops, args.threads):>12.0f}")
+        with connection() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 3 * args.ops
+        database.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Seeded synthetic data generator for the benchmark suite.
+import random
+from datetime import datetime, timedelta
+
+import auth_pool
+import feedback
+from database import connection
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+PASSWORD = "Bench!Pass1"
+BCRYPT_ROUNDS = 4        # cheapest bcrypt cost; the suite measures queries, not hashing
+CHUNK = 10_000
+
+def plan(rows):
+    """Split a total row budget across the tables roughly like a live deployment."""
+    users = max(20, rows // 100)
+    return {
+        "teams": max(2, users // 6),
+        "users": users,
+        "tasks": int(rows * 0.4),
+        "wellness": int(rows * 0.4),
+        "feedback": int(rows * 0.1),
+        "rewards": 50,
+    }
+
+def _chunks(rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _insert(conn, sql, rows):
+    for batch in _chunks(rows):
+        conn.executemany(sql, batch)
+        conn.commit()
+
+def generate(rows, seed=0):
+    """Fill the current database; returns the plan plus the ids scenarios sample from."""
+    rng = random.Random(seed)
+    counts = plan(rows)
+    pw_hash = auth_pool._hash(PASSWORD, BCRYPT_ROUNDS)
+    start = datetime(2023, 1, 1)
+    span = 2 * 365 * 24 * 3600
+    n_users, n_teams = counts["users"], counts["teams"]
+    with connection() as conn:
+        # random assignment overfills some teams, so lift the per-team cap
+        _insert(conn, "INSERT INTO teams(id,name,max_members) VALUES(?,?,?)",
+                ((t, f"Team {t}", n_users) for t in range(1, n_teams + 1)))
+        # one manager per team, the rest employees; ~10% of employees unassigned
+        _insert(conn, "INSERT INTO users(id,username,password_hash,role,team_id) VALUES(?,?,?,?,?)", (
+            (u, f"benchuser{u:07d}", pw_hash, "manager" if u <= n_teams else "user",
+             u if u <= n_teams else (None if rng.random() < 0.1 else rng.randint(1, n_teams)))
+            for u in range(1, n_users + 1)))
+        # opening ledger entries; the ledger trigger materializes points.balance
+        _insert(conn, "INSERT INTO points_ledger(user_id,delta,reason) VALUES(?,?,'opening')",
+                ((u, rng.randint(1, 500)) for u in range(1, n_users + 1)))
+        _insert(conn, "INSERT INTO rewards(name,cost,created_by) VALUES(?,?,?)",
+                ((f"Reward {r}", rng.randint(10, 300), rng.randint(1, n_teams)) for r in range(counts["rewards"])))
+        _insert(conn, "INSERT INTO tasks(title,description,assigned_to,completed,type,due_date) VALUES(?,?,?,?,?,?)", (
+            (f"Task {i}", "generated", rng.randint(1, n_users), int(rng.random() < 0.6),
+             "goal" if rng.random() < 0.2 else "task",
+             (start + timedelta(seconds=rng.randrange(span))).isoformat())
+            for i in range(counts["tasks"])))
+        _insert(conn, "INSERT INTO wellness(user_id,timestamp,stress_level,workload,notes) VALUES(?,?,?,?,?)", (
+            (rng.randint(1, n_users), (start + timedelta(seconds=rng.randrange(span))).strftime("%Y-%m-%d %H:%M:%S"),
+             rng.randint(1, 10), rng.choice(["low", "medium", "high"]), "generated")
+            for _ in range(counts["wellness"])))
+        # through feedback.py so messages are encrypted and indexed like live ones
+        feedback.insert_feedback(conn, (
+            (rng.randint(1, n_users), f"feedback message {i} about process and workload",
+             (start + timedelta(seconds=rng.randrange(span))).strftime("%Y-%m-%d %H:%M:%S"))
+            for i in range(counts["feedback"])))
+        conn.execute("ANALYZE")
+    return counts
@@ -0,0 +1,53 @@
+# Timed scenarios; each factory takes (counts, rng) and returns a zero-argument operation.
+import auth
+import rewards
+import stats
+import tasks
+import team
+import wellness
+import feedback
+import wellness_trends
+from benchmarks.datagen import PASSWORD
+
+def _user(counts, rng):
+    return rng.randint(1, counts["users"])
+
+def get_tasks(counts, rng):
+    return lambda: tasks.get_tasks(_user(counts, rng))
+
+def get_wellness(counts, rng):
+    return lambda: wellness.get_wellness(_user(counts, rng))
+
+def get_feedback(counts, rng):
+    return feedback.get_feedback
+
+def get_team_members(counts, rng):
+    return lambda: team.get_team_members(rng.randint(1, counts["teams"]))
+
+def get_available_employees(counts, rng):
+    return team.get_available_employees
+
+def redeem_reward(counts, rng):
+    return lambda: rewards.redeem_reward(_user(counts, rng), rng.randint(1, counts["rewards"]))
+
+def login(counts, rng):
+    return lambda: auth.login(f"benchuser{_user(counts, rng):07d}", PASSWORD)
+
+def dashboard_data(counts, rng):
+    # the queries behind dashboard_view, without building flet controls
+    def fetch():
+        uid = _user(counts, rng)
+        stats.get_user_stats(uid)
+        wellness_trends.stress_trend(uid)
+    return fetch
+
+SCENARIOS = {
+    "get_tasks": get_tasks,
+    "get_wellness": get_wellness,
+    "get_feedback": get_feedback,
+    "get_team_members": get_team_members,
+    "get_available_employees": get_available_employees,
+    "redeem_reward": redeem_reward,
+    "login": login,
+    "dashboard_data": dashboard_data,
+}
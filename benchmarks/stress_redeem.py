@@ -0,0 +1,84 @@
+# Concurrency stress test for redemptions: many threads earn and redeem against the same
+# few balances. Fails (exit 1) if any balance goes negative, drifts from its ledger sum,
+# or the cached leaderboard disagrees with the database.
+# Usage: python -m benchmarks.stress_redeem [--threads T] [--ops N] [--no-group-commit]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+import rewards
+from database import connection, init_db
+from leaderboard import LEADERBOARD
+
+USERS = 5
+REWARD_COSTS = (5, 20, 50)
+
+def seed():
+    with connection() as conn:
+        for u in range(1, USERS + 1):
+            conn.execute("INSERT INTO users(id,username,password_hash,role) VALUES(?,?,'x','user')", (u, f"stressuser{u}"))
+            conn.execute("INSERT INTO points(user_id) VALUES(?)", (u,))
+        conn.executemany("INSERT INTO rewards(name,cost) VALUES(?,?)", [(f"r{c}", c) for c in REWARD_COSTS])
+        conn.executemany("INSERT INTO points_ledger(user_id,delta,reason) VALUES(?,60,'opening')",
+                         [(u,) for u in range(1, USERS + 1)])
+
+def worker(seed_, ops, counts):
+    rng = random.Random(seed_)
+    for _ in range(ops):
+        uid = rng.randint(1, USERS)
+        if rng.random() < 0.25:
+            rewards.earn_points(uid, rng.randint(1, 10))
+        else:
+            ok = rewards.redeem_reward(uid, rng.randint(1, len(REWARD_COSTS)))
+            with counts["lock"]:
+                counts["ok" if ok else "refused"] += 1
+
+def verify():
+    problems = []
+    with connection() as conn:
+        rows = conn.execute("""
+            SELECT p.user_id, p.balance, (SELECT SUM(delta) FROM points_ledger l WHERE l.user_id = p.user_id) AS ledger,
+                   (SELECT MIN(running) FROM (SELECT SUM(delta) OVER (ORDER BY id) AS running
+                                             FROM points_ledger l WHERE l.user_id = p.user_id)) AS low
+            FROM points p""").fetchall()
+    for r in rows:
+        if r['balance'] < 0 or r['low'] < 0:
+            problems.append(f"user {r['user_id']} went negative (balance {r['balance']}, lowest {r['low']})")
+        if r['balance'] != r['ledger']:
+            problems.append(f"user {r['user_id']} balance {r['balance']} != ledger sum {r['ledger']}")
+    expected = sorted(((-r['balance'], r['user_id']) for r in rows))
+    cached = [(-bal, uid) for uid, _, bal in LEADERBOARD.top(USERS)]
+    if cached != expected:
+        problems.append(f"leaderboard cache {cached} != database {expected}")
+    return problems
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--ops", type=int, default=500, help="operations per thread")
+    ap.add_argument("--no-group-commit", action="store_true")
+    args = ap.parse_args()
+    database.GROUP_COMMIT = not args.no_group_commit
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, "stress.db")
+        init_db(); seed()
+        LEADERBOARD.reset(); LEADERBOARD.top()
+        counts = {"ok": 0, "refused": 0, "lock": threading.Lock()}
+        with ThreadPoolExecutor(args.threads) as pool:
+            for f in [pool.submit(worker, i, args.ops, counts) for i in range(args.threads)]:
+                f.result()
+        problems = verify()
+        database.shutdown()
+    print(f"{counts['ok']} redemptions succeeded, {counts['refused']} refused for insufficient points")
+    for p in problems:
+        print("FAIL:", p)
+    print("balances never went negative" if not problems else f"{len(problems)} problem(s)")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
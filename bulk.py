@@ -0,0 +1,185 @@
+# Streaming bulk import/export of users, teams, tasks, wellness and feedback (CSV or JSONL).
+# Usage:
+#   python bulk.py import users people.csv
+#   python bulk.py export tasks tasks.jsonl
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+from itertools import islice
+import archive
+import encryption
+import feedback
+from auth_pool import get_pool
+from database import connection, init_db, write
+from ui_utils import validate_username, validate_password
+
+CHUNK_SIZE = 1000
+
+# table -> (import columns, export query); exports read whole tables by design, archived rows included
+TABLES = {
+    "users": (("username", "password", "role", "team_id"), "SELECT id,username,role,team_id FROM users ORDER BY id"),  # full-scan
+    "teams": (("id", "name"), "SELECT id,name FROM teams ORDER BY id"),  # full-scan
+    "tasks": (("title", "description", "assigned_to", "completed", "type", "due_date"),
+              "SELECT id,title,description,assigned_to,completed,type,due_date,feedback FROM tasks ORDER BY id"),  # full-scan
+    "wellness": (("user_id", "timestamp", "stress_level", "workload", "notes"),
+                 "SELECT id,user_id,timestamp,stress_level,workload,notes FROM wellness ORDER BY id"),  # full-scan
+    "feedback": (("from_user", "message", "timestamp"), "SELECT id,from_user,message,timestamp FROM feedback ORDER BY id"),  # full-scan
+}
+REQUIRED = {
+    "users": ("username", "password", "role"),
+    "teams": ("name",),
+    "tasks": ("title", "type"),
+    "wellness": ("user_id",),
+    "feedback": ("message",),
+}
+INTEGER_COLUMNS = {"id", "team_id", "assigned_to", "completed", "user_id", "stress_level", "from_user"}
+
+def read_rows(path):
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+def clean(table, row):
+    """Return a tuple of import columns for row, or raise ValueError."""
+    columns = TABLES[table][0]
+    values = {}
+    for col in columns:
+        v = row.get(col)
+        if v == "" or v is None:
+            v = None
+        elif col in INTEGER_COLUMNS:
+            v = int(v)
+        values[col] = v
+    missing = [c for c in REQUIRED[table] if values[c] is None]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    if table == "users":
+        if not validate_username(values["username"]) or not validate_password(values["password"]):
+            raise ValueError("Invalid credentials format")
+        if values["role"] not in ("manager", "user"):
+            raise ValueError(f"invalid role {values['role']!r}")
+    elif table == "tasks":
+        if values["type"] not in ("task", "goal"):
+            raise ValueError(f"invalid type {values['type']!r}")
+        values["completed"] = values["completed"] or 0
+    return tuple(values[c] for c in columns)
+
+def _insert_users(conn, rows):
+    last = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+    conn.executemany("INSERT INTO users(username,password_hash,role,team_id) VALUES(?,?,?,?)", rows)
+    conn.execute("INSERT OR IGNORE INTO points(user_id) SELECT id FROM users WHERE id>?", (last,))
+
+def _prepare(table, rows):
+    """Return (insert, rows): the rows as stored and a write op inserting them."""
+    columns = TABLES[table][0]
+    if table == "users":
+        # bcrypt the whole chunk in parallel on the auth pool
+        futures = [get_pool().hash(r[1]) for r in rows]
+        return _insert_users, [(r[0], f.result(), r[2], r[3]) for r, f in zip(rows, futures)]
+    if table == "feedback":
+        return feedback.insert_feedback, rows
+    if table in encryption.FIELDS:
+        i = columns.index(encryption.FIELDS[table])
+        rows = [r[:i] + (encryption.encrypt_field(r[i]),) + r[i + 1:] for r in rows]
+    # missing timestamps fall back to what the column default would have been
+    values = ",".join("COALESCE(?,CURRENT_TIMESTAMP)" if c == "timestamp" else "?" for c in columns)
+    sql = f"INSERT INTO {table}({','.join(columns)}) VALUES({values})"
+    return (lambda conn, rows: conn.executemany(sql, rows)), rows
+
+def _insert_each(conn, insert, rows):
+    # one savepoint per row, so a constraint violation only drops its own row
+    failed = []
+    for i, row in enumerate(rows):
+        conn.execute("SAVEPOINT row")
+        try:
+            insert(conn, [row])
+        except sqlite3.IntegrityError as e:
+            conn.execute("ROLLBACK TO row")
+            failed.append((i, e))
+        conn.execute("RELEASE row")
+    return failed
+
+def _insert(table, rows):
+    """Insert a chunk in one write; returns [(index, error)] for rows rejected by a constraint.
+    The whole chunk goes in at once and is only retried row by row if that fails."""
+    insert, rows = _prepare(table, rows)
+    try:
+        write(insert, rows)
+    except sqlite3.IntegrityError:
+        return write(_insert_each, insert, rows)
+    return []
+
+def import_file(table, path, chunk_size=CHUNK_SIZE, errors=sys.stderr):
+    """Load path into table in chunked transactions; returns (imported, rejected)."""
+    imported = rejected = 0
+    numbered = enumerate(read_rows(path), 1)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return imported, rejected
+        rows, lines = [], []
+        for lineno, row in chunk:
+            try:
+                rows.append(clean(table, row))
+                lines.append(lineno)
+            except (ValueError, TypeError) as e:
+                rejected += 1
+                print(f"{path}:{lineno}: skipped: {e}", file=errors)
+        if rows:
+            failed = _insert(table, rows)
+            for i, e in failed:
+                print(f"{path}:{lines[i]}: skipped: {e}", file=errors)
+            imported += len(rows) - len(failed)
+            rejected += len(failed)
+
+def export_file(table, path, batch_size=CHUNK_SIZE):
+    """Stream table (and its archive) to path straight from the cursor, decrypting as it goes;
+    returns the row count."""
+    count = 0
+    with connection() as conn, open(path, "w", newline="", encoding="utf-8") as f:
+        sql = TABLES[table][1]
+        if table in archive.RETENTION_DAYS:
+            sql = archive.with_archive(conn, sql, None, table)
+        cur = conn.execute(sql)
+        names = [d[0] for d in cur.description]
+        secret = names.index(encryption.FIELDS[table]) if table in encryption.FIELDS else None
+        out = None if path.endswith(".jsonl") else csv.writer(f)
+        if out:
+            out.writerow(names)
+        while True:
+            batch = cur.fetchmany(batch_size)
+            if not batch:
+                return count
+            if secret is not None:
+                plain = encryption.decrypt_many((row[secret] for row in batch), cache=False)
+                batch = [row[:secret] + (p,) + row[secret + 1:] for row, p in zip(map(tuple, batch), plain)]
+            for row in batch:
+                if out:
+                    out.writerow(tuple(row))
+                else:
+                    f.write(json.dumps(dict(zip(names, tuple(row)))) + "\n")
+            count += len(batch)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bulk import/export in CSV or JSONL")
+    ap.add_argument("action", choices=["import", "export"])
+    ap.add_argument("table", choices=sorted(TABLES))
+    ap.add_argument("path", help="a .csv or .jsonl file")
+    ap.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = ap.parse_args(argv)
+    init_db()
+    if args.action == "import":
+        imported, rejected = import_file(args.table, args.path, args.chunk_size)
+        print(f"imported {imported} {args.table} row(s), rejected {rejected}")
+    else:
+        print(f"exported {export_file(args.table, args.path, args.chunk_size)} {args.table} row(s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Runs EXPLAIN QUERY PLAN on every SQL literal in the codebase against a freshly
+# migrated schema and fails if any query still scans a whole table.
+# Deliberate whole-table queries (exports, rebuilds) opt out with a "# full-scan" comment on their line.
+# Usage: python check_query_plans.py [paths...]
+import ast
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+import database
+
+ROOT = Path(__file__).resolve().parent
+SKIP_DIRS = {"benchmarks", "venv", ".venv"}
+QUERY_RE = re.compile(r"^\s*(SELECT\b|UPDATE \w+ SET\b|DELETE FROM\b|WITH\b|INSERT INTO \w+(\s*\([^)]*\))?\s+SELECT\b)")
+FULL_SCAN_RE = re.compile(r"^SCAN (\w+)(?: AS \w+)?$")
+# Small catalogue tables that are listed in full by design
+# (team_burnout_scores has one row per team)
+FULL_SCAN_OK = {"rewards", "training", "teams", "team_burnout_scores"}
+
+def iter_queries(paths):
+    for path in paths:
+        source = path.read_text()
+        lines = source.splitlines()
+        tree = ast.parse(source, str(path))
+        # fragments of concatenated or f-string queries cannot be planned on their own
+        fragments = {id(part) for node in ast.walk(tree) if isinstance(node, (ast.BinOp, ast.JoinedStr))
+                     for part in ast.iter_child_nodes(node)}
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Constant) and isinstance(node.value, str)
+                    and id(node) not in fragments and QUERY_RE.match(node.value)
+                    and "# full-scan" not in lines[node.end_lineno - 1]):
+                yield path.relative_to(ROOT), node.lineno, node.value
+
+def bindings(sql):
+    names = re.findall(r":(\w+)", sql)
+    if names:
+        return {n: None for n in names}
+    return [None] * sql.count("?")
+
+def plan(conn, sql):
+    return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, bindings(sql))]
+
+def check(paths):
+    conn = sqlite3.connect(":memory:")
+    database.migrate(conn)
+    tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    failures = 0
+    for path, line, sql in iter_queries(paths):
+        try:
+            details = plan(conn, sql)
+        except sqlite3.Error as e:
+            print(f"{path}:{line}: cannot plan query ({e}): {sql.strip()}")
+            failures += 1
+            continue
+        scans = [m.group(1) for m in map(FULL_SCAN_RE.match, details) if m and m.group(1) in tables - FULL_SCAN_OK]
+        if scans:
+            print(f"{path}:{line}: full scan of {', '.join(scans)}: {sql.strip()}")
+            failures += 1
+    conn.close()
+    return failures
+
+def main(argv):
+    if argv:
+        paths = [Path(p).resolve() for p in argv]
+    else:
+        paths = [p for p in sorted(ROOT.rglob("*.py"))
+                 if not SKIP_DIRS & set(p.relative_to(ROOT).parts) and p.name != Path(__file__).name]
+    failures = check(paths)
+    print(f"{failures} query plan problem(s)" if failures else "all query plans use indexes")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
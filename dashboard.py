@@ -1,19 +1,16 @@
+import asyncio
 import flet as ft
 from flet import PieChart, LineChart
-from tasks import get_tasks
-from wellness import get_wellness
+import async_data as db
 
-def dashboard_view(page, user, role):
-    # Task metrics
-    tasks = get_tasks(user['id'])
-    total = len(tasks)
-    completed = sum(1 for t in tasks if t['completed'])
-    pending = total - completed
-
-    # Wellness data
-    wellness = get_wellness(user['id'])
-    dates = [w['timestamp'][:10] for w in wellness]
-    stress = [w['stress_level'] for w in wellness]
+async def dashboard_view(page, user, role=None):
+    # Task metrics from the trigger-maintained summary row and the wellness trend
+    # from daily rollups (capped at MAX_CHART_POINTS), fetched concurrently
+    stats, (dates, stress) = await asyncio.gather(
+        db.stats.get_user_stats(user['id']), db.wellness_trends.stress_trend(user['id']))
+    total = stats['tasks_total']
+    completed = stats['tasks_completed']
+    pending = stats['tasks_pending']
 
     # Pie chart for tasks
     pie = PieChart(
@@ -34,7 +31,8 @@ def dashboard_view(page, user, role):
 
     # Layout animated cards + charts
     cards = []
-    for label, value in [("Tasks", f"{completed}/{total}"), ("Pending", str(pending))]:
+    avg_stress = "-" if stats['avg_stress'] is None else f"{stats['avg_stress']:.1f}"
+    for label, value in [("Tasks", f"{completed}/{total}"), ("Pending", str(pending)), ("Avg Stress", avg_stress)]:
         cards.append(ft.Card(
             elevation=5,
             margin=10,
@@ -1,97 +1,852 @@
+import functools
+import queue
+import re
 import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
 from sqlite3 import Connection
+import profiling
 
 DB_PATH = "app.db"
 
+# Pooled connection tuning
+POOL_SIZE = 8
+POOL_TIMEOUT = 30.0
+STATEMENT_CACHE_SIZE = 256
+PRAGMAS = (
+    ("auto_vacuum", "INCREMENTAL"),  # takes effect on new databases; existing ones need one VACUUM
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("cache_size", -16000),      # ~16 MiB page cache per connection
+    ("mmap_size", 268435456),    # 256 MiB memory-mapped reads
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", 5000),
+)
+
+# Reporting reads use their own pool of read-only connections; write-side pragmas don't apply there
+REPORT_POOL_SIZE = 4
+REPORT_PRAGMAS = tuple(p for p in PRAGMAS if p[0] not in ("auto_vacuum", "journal_mode", "synchronous")) + (
+    ("query_only", "ON"),
+)
+
+# Group commit: writes from all threads are batched into one transaction by a single writer
+GROUP_COMMIT = True
+WRITE_BATCH_SIZE = 128
+WRITE_BATCH_WINDOW = 0.002   # seconds to wait for more writes before committing a batch
+WRITE_QUEUE_SIZE = 4096
+WRITE_TIMEOUT = 30.0
+
 def get_conn() -> Connection:
     conn = sqlite3.connect(DB_PATH, check_same_thread=False)
     conn.row_factory = sqlite3.Row
     return conn
 
-# Initialize tables
-def init_db():
-    conn = get_conn()
-    c = conn.cursor()
-    # Users
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS users (
-        id INTEGER PRIMARY KEY,
-        username TEXT UNIQUE NOT NULL,
-        password_hash TEXT NOT NULL,
-        role TEXT CHECK(role IN ('manager','user')) NOT NULL,
-        team_id INTEGER,
-        FOREIGN KEY(team_id) REFERENCES teams(id)
-    )
-    """)
-    # Teams
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS teams (
-        id INTEGER PRIMARY KEY,
-        name TEXT NOT NULL
-    )
-    """)
-    # Tasks & Goals
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS tasks (
-        id INTEGER PRIMARY KEY,
-        title TEXT NOT NULL,
-        description TEXT,
-        assigned_to INTEGER,
-        completed INTEGER DEFAULT 0,
-        type TEXT CHECK(type IN ('task','goal')) NOT NULL,
-        due_date TEXT,
-        feedback TEXT,
-        FOREIGN KEY(assigned_to) REFERENCES users(id)
-    )
-    """)
-    # Wellness
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS wellness (
-        id INTEGER PRIMARY KEY,
-        user_id INTEGER,
-        timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
-        stress_level INTEGER,
-        workload TEXT,
-        notes TEXT,
-        FOREIGN KEY(user_id) REFERENCES users(id)
-    )
-    """)
-    # Feedback
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS feedback (
-        id INTEGER PRIMARY KEY,
-        from_user INTEGER,
-        message TEXT NOT NULL,
-        timestamp TEXT DEFAULT CURRENT_TIMESTAMP
-    )
-    """)
-    # Training
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS training (
-        id INTEGER PRIMARY KEY,
-        title TEXT NOT NULL,
-        url TEXT NOT NULL,
-        added_by INTEGER,
-        FOREIGN KEY(added_by) REFERENCES users(id)
-    )
-    """)
-    # Rewards
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS rewards (
-        id INTEGER PRIMARY KEY,
-        name TEXT NOT NULL,
-        cost INTEGER NOT NULL,
-        created_by INTEGER,
-        FOREIGN KEY(created_by) REFERENCES users(id)
-    )
-    """)
-    # Recognition points
-    c.execute("""
-    CREATE TABLE IF NOT EXISTS points (
-        user_id INTEGER PRIMARY KEY,
-        balance INTEGER DEFAULT 0,
-        FOREIGN KEY(user_id) REFERENCES users(id)
-    )
-    """)
+def _open(path, readonly=False) -> Connection:
+    if readonly:
+        uri = Path(path).absolute().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    else:
+        conn = sqlite3.connect(path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.row_factory = sqlite3.Row
+    for name, value in REPORT_PRAGMAS if readonly else PRAGMAS:
+        conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+class ConnectionPool:
+    """Bounded pool of tuned connections; idle connections are reused LIFO."""
+
+    def __init__(self, path, size=POOL_SIZE, readonly=False):
+        self.path = path
+        self.readonly = readonly
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self, timeout=POOL_TIMEOUT) -> Connection:
+        if not self._slots.acquire(timeout=timeout):
+            raise sqlite3.OperationalError("connection pool exhausted")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            return _open(self.path, self.readonly)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+        self._slots.release()
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+_pool = None
+_report_pool = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+def _get_pool() -> ConnectionPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.path != DB_PATH:
+            if _pool is not None:
+                _pool.close()
+            _pool = ConnectionPool(DB_PATH)
+        return _pool
+
+def _get_report_pool() -> ConnectionPool:
+    global _report_pool
+    with _pool_lock:
+        if _report_pool is None or _report_pool.path != DB_PATH:
+            if _report_pool is not None:
+                _report_pool.close()
+            _report_pool = ConnectionPool(DB_PATH, REPORT_POOL_SIZE, readonly=True)
+        return _report_pool
+
+def _pin(handle):
+    pin = getattr(_local, "pin", None)
+    if pin is not None:
+        pin(handle)
+
+@contextmanager
+def pinned(callback):
+    """Pass each pooled connection this thread takes to callback (and None when it goes back),
+    so another thread can interrupt whatever the block is running."""
+    _local.pin = callback
+    try:
+        yield
+    finally:
+        _local.pin = None
+
+@contextmanager
+def connection():
+    # Nested use on the same thread shares the outer connection and transaction
+    held = getattr(_local, "conn", None)
+    if held is not None:
+        yield held
+        return
+    pool = _get_pool()
+    conn = pool.acquire()
+    handle = profiling.wrap(conn) if profiling.ENABLED else conn
+    _local.conn = handle
+    try:
+        _pin(handle)
+        yield handle
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        _pin(None)
+        _local.conn = None
+        if handle is not conn:
+            handle.finish()
+        pool.release(conn)
+
+@contextmanager
+def snapshot():
+    """Read-only connection holding one read transaction for the whole block.
+
+    The snapshot is taken at the block's first read, so every later query sees the same
+    committed state. In WAL mode it neither waits for nor delays the writer (it does hold
+    back checkpoints, so keep blocks to one report). Nested connection()/snapshot() calls
+    share it; inside an existing connection the block simply reuses that one.
+    """
+    held = getattr(_local, "conn", None)
+    if held is not None:
+        yield held
+        return
+    pool = _get_report_pool()
+    conn = pool.acquire()
+    handle = profiling.wrap(conn) if profiling.ENABLED else conn
+    _local.conn = handle
+    _local.snapshot = True
+    try:
+        _pin(handle)
+        conn.execute("BEGIN")
+        yield handle
+    finally:
+        _pin(None)
+        _local.conn = None
+        _local.snapshot = False
+        if handle is not conn:
+            handle.finish()
+        pool.release(conn)  # rolls back, ending the read transaction
+
+def reporting(fn):
+    """Run fn in its own snapshot(); async_data pins such reads to the snapshot connection."""
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        with snapshot():
+            return fn(*args, **kwargs)
+    run.reporting = True
+    return run
+
+def own_connections(fn):
+    """Mark fn as taking its own connections (say, a snapshot only on a cache miss); async_data
+    then doesn't hold one for it up front and interrupts whichever fn has open."""
+    fn.own_connections = True
+    return fn
+
+class WriteQueue:
+    """Single writer thread that commits queued write operations in batches.
+
+    Each operation runs inside its own savepoint, so a failing operation only
+    fails its own future; the rest of the batch still commits.
+    """
+
+    def __init__(self, path, batch_size=WRITE_BATCH_SIZE, window=WRITE_BATCH_WINDOW, maxsize=WRITE_QUEUE_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.window = window
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, timeout=WRITE_TIMEOUT) -> Future:
+        fut = Future()
+        try:
+            # blocks when the queue is full, pushing back on producers
+            self._queue.put((fn, args, fut), timeout=timeout)
+        except queue.Full:
+            raise sqlite3.OperationalError("write queue full") from None
+        return fut
+
+    def _run(self):
+        conn = _open(self.path)
+        _local.conn = conn
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            self._commit(conn, batch)
+        _local.conn = None
+        conn.close()
+
+    def _commit(self, conn, batch):
+        results = []
+        handle = profiling.wrap(conn) if profiling.ENABLED else conn
+        _local.conn = handle
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for fn, args, fut in batch:
+                if not fut.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT op")
+                try:
+                    result = fn(handle, *args)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO op")
+                    conn.execute("RELEASE op")
+                    fut.set_exception(e)
+                else:
+                    conn.execute("RELEASE op")
+                    results.append((fut, result))
+            conn.commit()
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            for _, _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        finally:
+            if handle is not conn:
+                handle.finish()
+            _local.conn = conn
+        for fut, result in results:
+            fut.set_result(result)
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+_writer = None
+
+def _get_writer() -> WriteQueue:
+    global _writer
+    with _pool_lock:
+        if _writer is None or _writer.path != DB_PATH:
+            if _writer is not None:
+                _writer.close()
+            _writer = WriteQueue(DB_PATH)
+        return _writer
+
+def submit_write(fn, *args) -> Future:
+    """Queue fn(conn, *args) for the next group commit; the future holds its result."""
+    if not GROUP_COMMIT or (getattr(_local, "conn", None) is not None and not getattr(_local, "snapshot", False)):
+        # no queue, or already inside a transaction on this thread (e.g. the writer itself);
+        # from inside a read-only snapshot the write is queued as usual and the snapshot won't see it
+        fut = Future()
+        try:
+            with connection() as conn:
+                fut.set_result(fn(conn, *args))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+    return _get_writer().submit(fn, *args)
+
+def write(fn, *args):
+    return submit_write(fn, *args).result()
+
+def shutdown():
+    global _pool, _report_pool, _writer
+    with _pool_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+    with _pool_lock:
+        for pool in (_pool, _report_pool):
+            if pool is not None:
+                pool.close()
+        _pool = _report_pool = None
+
+# user_stats recomputed from scratch; used to backfill and to check the trigger-maintained table
+USER_STATS_SOURCE = """
+    SELECT u.user_id,
+           COALESCE(t.total, 0), COALESCE(t.done, 0),
+           COALESCE(w.n, 0), COALESCE(w.sn, 0), COALESCE(w.ss, 0),
+           (SELECT stress_level FROM wellness WHERE user_id = u.user_id ORDER BY timestamp DESC, id DESC LIMIT 1),
+           (SELECT timestamp FROM wellness WHERE user_id = u.user_id ORDER BY timestamp DESC, id DESC LIMIT 1)
+    FROM (SELECT assigned_to AS user_id FROM tasks WHERE assigned_to IS NOT NULL
+          UNION SELECT user_id FROM wellness WHERE user_id IS NOT NULL) u
+    LEFT JOIN (SELECT assigned_to, COUNT(*) AS total, SUM(COALESCE(completed, 0)) AS done
+               FROM tasks GROUP BY assigned_to) t ON t.assigned_to = u.user_id
+    LEFT JOIN (SELECT user_id, COUNT(*) AS n, COUNT(stress_level) AS sn, SUM(COALESCE(stress_level, 0)) AS ss
+               FROM wellness GROUP BY user_id) w ON w.user_id = u.user_id
+"""
+
+DUE_TS_EXPR = ("CAST(strftime('%s', due_date, "
+               "CASE WHEN length(due_date) = 10 THEN '+1 day' ELSE '+0 seconds' END) AS INTEGER)")
+
+def _blind_feedback_index(conn):
+    # encryption (and its key files) is only needed when there is feedback to re-index
+    rows = conn.execute("SELECT id, message FROM feedback").fetchall()  # full-scan
+    if rows:
+        import encryption
+        conn.executemany("INSERT INTO feedback_fts(rowid, message) VALUES(?,?)",
+                         ((i, encryption.blind_terms(encryption.decrypt_field(m, cache=False))) for i, m in rows))
+
+# Schema migrations, applied in order; PRAGMA user_version records how many have run.
+# Each step is a SQL string or a callable taking the connection.
+MIGRATIONS = [
+    # 1: base tables
+    (
+        # Users
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            role TEXT CHECK(role IN ('manager','user')) NOT NULL,
+            team_id INTEGER,
+            FOREIGN KEY(team_id) REFERENCES teams(id)
+        )
+        """,
+        # Teams
+        """
+        CREATE TABLE IF NOT EXISTS teams (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL
+        )
+        """,
+        # Tasks & Goals
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            assigned_to INTEGER,
+            completed INTEGER DEFAULT 0,
+            type TEXT CHECK(type IN ('task','goal')) NOT NULL,
+            due_date TEXT,
+            feedback TEXT,
+            FOREIGN KEY(assigned_to) REFERENCES users(id)
+        )
+        """,
+        # Wellness
+        """
+        CREATE TABLE IF NOT EXISTS wellness (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP,
+            stress_level INTEGER,
+            workload TEXT,
+            notes TEXT,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+        """,
+        # Feedback
+        """
+        CREATE TABLE IF NOT EXISTS feedback (
+            id INTEGER PRIMARY KEY,
+            from_user INTEGER,
+            message TEXT NOT NULL,
+            timestamp TEXT DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        # Training
+        """
+        CREATE TABLE IF NOT EXISTS training (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            url TEXT NOT NULL,
+            added_by INTEGER,
+            FOREIGN KEY(added_by) REFERENCES users(id)
+        )
+        """,
+        # Rewards
+        """
+        CREATE TABLE IF NOT EXISTS rewards (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            cost INTEGER NOT NULL,
+            created_by INTEGER,
+            FOREIGN KEY(created_by) REFERENCES users(id)
+        )
+        """,
+        # Recognition points
+        """
+        CREATE TABLE IF NOT EXISTS points (
+            user_id INTEGER PRIMARY KEY,
+            balance INTEGER DEFAULT 0,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+        """,
+    ),
+    # 2: indexes for hot lookups
+    (
+        "CREATE INDEX IF NOT EXISTS idx_tasks_assigned ON tasks(assigned_to, completed)",
+        "CREATE INDEX IF NOT EXISTS idx_wellness_user_ts ON wellness(user_id, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_feedback_ts ON feedback(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_users_team ON users(team_id, username)",
+        "CREATE INDEX IF NOT EXISTS idx_users_role_team ON users(role, team_id, username)",
+    ),
+    # 3: per-user summary maintained by triggers
+    (
+        """
+        CREATE TABLE IF NOT EXISTS user_stats (
+            user_id INTEGER PRIMARY KEY,
+            tasks_total INTEGER NOT NULL DEFAULT 0,
+            tasks_completed INTEGER NOT NULL DEFAULT 0,
+            wellness_count INTEGER NOT NULL DEFAULT 0,
+            stress_count INTEGER NOT NULL DEFAULT 0,
+            stress_sum INTEGER NOT NULL DEFAULT 0,
+            latest_stress INTEGER,
+            latest_stress_at TEXT,
+            FOREIGN KEY(user_id) REFERENCES users(id)
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_task_insert AFTER INSERT ON tasks
+        WHEN NEW.assigned_to IS NOT NULL BEGIN
+            INSERT INTO user_stats(user_id, tasks_total, tasks_completed)
+            VALUES (NEW.assigned_to, 1, COALESCE(NEW.completed, 0))
+            ON CONFLICT(user_id) DO UPDATE SET
+                tasks_total = tasks_total + 1,
+                tasks_completed = tasks_completed + excluded.tasks_completed;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_task_delete AFTER DELETE ON tasks
+        WHEN OLD.assigned_to IS NOT NULL BEGIN
+            UPDATE user_stats SET
+                tasks_total = tasks_total - 1,
+                tasks_completed = tasks_completed - COALESCE(OLD.completed, 0)
+            WHERE user_id = OLD.assigned_to;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_task_update AFTER UPDATE OF completed, assigned_to ON tasks BEGIN
+            UPDATE user_stats SET
+                tasks_total = tasks_total - 1,
+                tasks_completed = tasks_completed - COALESCE(OLD.completed, 0)
+            WHERE user_id = OLD.assigned_to;
+            INSERT INTO user_stats(user_id, tasks_total, tasks_completed)
+            SELECT NEW.assigned_to, 1, COALESCE(NEW.completed, 0) WHERE NEW.assigned_to IS NOT NULL
+            ON CONFLICT(user_id) DO UPDATE SET
+                tasks_total = tasks_total + 1,
+                tasks_completed = tasks_completed + excluded.tasks_completed;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_wellness_insert AFTER INSERT ON wellness
+        WHEN NEW.user_id IS NOT NULL BEGIN
+            INSERT INTO user_stats(user_id, wellness_count, stress_count, stress_sum)
+            VALUES (NEW.user_id, 1, NEW.stress_level IS NOT NULL, COALESCE(NEW.stress_level, 0))
+            ON CONFLICT(user_id) DO UPDATE SET
+                wellness_count = wellness_count + 1,
+                stress_count = stress_count + excluded.stress_count,
+                stress_sum = stress_sum + excluded.stress_sum;
+            UPDATE user_stats SET (latest_stress, latest_stress_at) = (
+                SELECT stress_level, timestamp FROM wellness WHERE user_id = NEW.user_id
+                ORDER BY timestamp DESC, id DESC LIMIT 1)
+            WHERE user_id = NEW.user_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_wellness_delete AFTER DELETE ON wellness
+        WHEN OLD.user_id IS NOT NULL BEGIN
+            UPDATE user_stats SET
+                wellness_count = wellness_count - 1,
+                stress_count = stress_count - (OLD.stress_level IS NOT NULL),
+                stress_sum = stress_sum - COALESCE(OLD.stress_level, 0)
+            WHERE user_id = OLD.user_id;
+            UPDATE user_stats SET (latest_stress, latest_stress_at) = (
+                SELECT stress_level, timestamp FROM wellness WHERE user_id = OLD.user_id
+                ORDER BY timestamp DESC, id DESC LIMIT 1)
+            WHERE user_id = OLD.user_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_stats_wellness_update AFTER UPDATE OF user_id, stress_level, timestamp ON wellness BEGIN
+            UPDATE user_stats SET
+                wellness_count = wellness_count - 1,
+                stress_count = stress_count - (OLD.stress_level IS NOT NULL),
+                stress_sum = stress_sum - COALESCE(OLD.stress_level, 0)
+            WHERE user_id = OLD.user_id;
+            INSERT INTO user_stats(user_id, wellness_count, stress_count, stress_sum)
+            SELECT NEW.user_id, 1, NEW.stress_level IS NOT NULL, COALESCE(NEW.stress_level, 0)
+            WHERE NEW.user_id IS NOT NULL
+            ON CONFLICT(user_id) DO UPDATE SET
+                wellness_count = wellness_count + 1,
+                stress_count = stress_count + excluded.stress_count,
+                stress_sum = stress_sum + excluded.stress_sum;
+            UPDATE user_stats SET (latest_stress, latest_stress_at) = (
+                SELECT stress_level, timestamp FROM wellness WHERE user_id = user_stats.user_id
+                ORDER BY timestamp DESC, id DESC LIMIT 1)
+            WHERE user_id IN (OLD.user_id, NEW.user_id);
+        END
+        """,
+        "INSERT INTO user_stats SELECT * FROM (" + USER_STATS_SOURCE + ") WHERE true",
+    ),
+    # 4: day/week/month stress rollups, append-only so they keep history that is archived or pruned
+    (
+        """
+        CREATE TABLE IF NOT EXISTS wellness_rollups (
+            user_id INTEGER NOT NULL,
+            grain TEXT CHECK(grain IN ('day','week','month')) NOT NULL,
+            bucket TEXT NOT NULL,
+            entries INTEGER NOT NULL,
+            stress_sum INTEGER NOT NULL,
+            stress_min INTEGER NOT NULL,
+            stress_max INTEGER NOT NULL,
+            PRIMARY KEY(user_id, grain, bucket)
+        ) WITHOUT ROWID
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_wellness_insert AFTER INSERT ON wellness
+        WHEN NEW.user_id IS NOT NULL AND NEW.stress_level IS NOT NULL AND date(NEW.timestamp) IS NOT NULL BEGIN
+            INSERT INTO wellness_rollups VALUES (NEW.user_id, 'day', date(NEW.timestamp), 1, NEW.stress_level, NEW.stress_level, NEW.stress_level)
+            ON CONFLICT DO UPDATE SET entries = entries + 1, stress_sum = stress_sum + excluded.stress_sum,
+                stress_min = min(stress_min, excluded.stress_min), stress_max = max(stress_max, excluded.stress_max);
+            INSERT INTO wellness_rollups VALUES (NEW.user_id, 'week', strftime('%Y-W%W', NEW.timestamp), 1, NEW.stress_level, NEW.stress_level, NEW.stress_level)
+            ON CONFLICT DO UPDATE SET entries = entries + 1, stress_sum = stress_sum + excluded.stress_sum,
+                stress_min = min(stress_min, excluded.stress_min), stress_max = max(stress_max, excluded.stress_max);
+            INSERT INTO wellness_rollups VALUES (NEW.user_id, 'month', strftime('%Y-%m', NEW.timestamp), 1, NEW.stress_level, NEW.stress_level, NEW.stress_level)
+            ON CONFLICT DO UPDATE SET entries = entries + 1, stress_sum = stress_sum + excluded.stress_sum,
+                stress_min = min(stress_min, excluded.stress_min), stress_max = max(stress_max, excluded.stress_max);
+        END
+        """,
+        """
+        INSERT INTO wellness_rollups
+        SELECT user_id, 'day', date(timestamp) AS bucket, COUNT(*), SUM(stress_level), MIN(stress_level), MAX(stress_level)
+        FROM wellness WHERE user_id IS NOT NULL AND stress_level IS NOT NULL AND date(timestamp) IS NOT NULL
+        GROUP BY user_id, bucket
+        """,
+        """
+        INSERT INTO wellness_rollups
+        SELECT user_id, 'week', strftime('%Y-W%W', timestamp) AS bucket, COUNT(*), SUM(stress_level), MIN(stress_level), MAX(stress_level)
+        FROM wellness WHERE user_id IS NOT NULL AND stress_level IS NOT NULL AND date(timestamp) IS NOT NULL
+        GROUP BY user_id, bucket
+        """,
+        """
+        INSERT INTO wellness_rollups
+        SELECT user_id, 'month', strftime('%Y-%m', timestamp) AS bucket, COUNT(*), SUM(stress_level), MIN(stress_level), MAX(stress_level)
+        FROM wellness WHERE user_id IS NOT NULL AND stress_level IS NOT NULL AND date(timestamp) IS NOT NULL
+        GROUP BY user_id, bucket
+        """,
+    ),
+    # 5: keyset pagination of a user's tasks or goals
+    (
+        "CREATE INDEX IF NOT EXISTS idx_tasks_assigned_type ON tasks(assigned_to, type)",
+    ),
+    # 6: append-only points ledger; points.balance is its materialized sum
+    (
+        """
+        CREATE TABLE IF NOT EXISTS points_ledger (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            delta INTEGER NOT NULL,
+            reason TEXT CHECK(reason IN ('opening','earn','redeem','adjust')) NOT NULL,
+            reward_id INTEGER,
+            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY(user_id) REFERENCES users(id),
+            FOREIGN KEY(reward_id) REFERENCES rewards(id)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_ledger_user_ts ON points_ledger(user_id, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_points_balance ON points(balance)",
+        # carry existing balances over before the sync trigger exists
+        "INSERT INTO points_ledger(user_id, delta, reason) SELECT user_id, balance, 'opening' FROM points WHERE balance <> 0",  # full-scan
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_ledger_apply AFTER INSERT ON points_ledger BEGIN
+            INSERT INTO points(user_id, balance) VALUES (NEW.user_id, NEW.delta)
+            ON CONFLICT(user_id) DO UPDATE SET balance = balance + excluded.balance;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_points_nonnegative BEFORE UPDATE OF balance ON points
+        WHEN NEW.balance < 0 BEGIN
+            SELECT RAISE(ABORT, 'insufficient points');
+        END
+        """,
+    ),
+    # 7: completion time for on-time scoring, and per-assignee due-date ranges
+    (
+        "ALTER TABLE tasks ADD COLUMN completed_at TEXT",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_tasks_completed_at AFTER UPDATE OF completed ON tasks
+        WHEN NEW.completed IS NOT OLD.completed BEGIN
+            UPDATE tasks SET completed_at = CASE WHEN NEW.completed THEN CURRENT_TIMESTAMP END WHERE id = NEW.id;
+        END
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_assigned_due ON tasks(assigned_to, due_date)",
+    ),
+    # 8: full-text search over feedback messages and training resources, synced by triggers
+    (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS feedback_fts USING fts5(message, content='feedback', content_rowid='id', prefix='2 3')",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_fts_insert AFTER INSERT ON feedback BEGIN
+            INSERT INTO feedback_fts(rowid, message) VALUES (NEW.id, NEW.message);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_fts_delete AFTER DELETE ON feedback BEGIN
+            INSERT INTO feedback_fts(feedback_fts, rowid, message) VALUES ('delete', OLD.id, OLD.message);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_feedback_fts_update AFTER UPDATE OF message ON feedback BEGIN
+            INSERT INTO feedback_fts(feedback_fts, rowid, message) VALUES ('delete', OLD.id, OLD.message);
+            INSERT INTO feedback_fts(rowid, message) VALUES (NEW.id, NEW.message);
+        END
+        """,
+        "INSERT INTO feedback_fts(feedback_fts) VALUES ('rebuild')",
+        "CREATE VIRTUAL TABLE IF NOT EXISTS training_fts USING fts5(title, url, content='training', content_rowid='id', prefix='2 3')",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_training_fts_insert AFTER INSERT ON training BEGIN
+            INSERT INTO training_fts(rowid, title, url) VALUES (NEW.id, NEW.title, NEW.url);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_training_fts_delete AFTER DELETE ON training BEGIN
+            INSERT INTO training_fts(training_fts, rowid, title, url) VALUES ('delete', OLD.id, OLD.title, OLD.url);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_training_fts_update AFTER UPDATE OF title, url ON training BEGIN
+            INSERT INTO training_fts(training_fts, rowid, title, url) VALUES ('delete', OLD.id, OLD.title, OLD.url);
+            INSERT INTO training_fts(rowid, title, url) VALUES (NEW.id, NEW.title, NEW.url);
+        END
+        """,
+        "INSERT INTO training_fts(training_fts) VALUES ('rebuild')",
+    ),
+    # 9: cold tiers for completed tasks and old wellness entries (see archive.py). Rows keep their
+    # ids and column order. While archive_guard has a row, deletes leave user_stats alone.
+    (
+        """
+        CREATE TABLE IF NOT EXISTS tasks_archive (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            assigned_to INTEGER,
+            completed INTEGER DEFAULT 0,
+            type TEXT NOT NULL,
+            due_date TEXT,
+            feedback TEXT,
+            completed_at TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_tasks_archive_assigned_due ON tasks_archive(assigned_to, due_date)",
+        """
+        CREATE TABLE IF NOT EXISTS wellness_archive (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER,
+            timestamp TEXT,
+            stress_level INTEGER,
+            workload TEXT,
+            notes TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_wellness_archive_user_ts ON wellness_archive(user_id, timestamp)",
+        # archive candidates, found without scanning the hot tables
+        "CREATE INDEX IF NOT EXISTS idx_tasks_done_due ON tasks(due_date) WHERE completed = 1",
+        "CREATE INDEX IF NOT EXISTS idx_wellness_ts ON wellness(timestamp)",
+        # rows older than horizon may live in <tbl>_archive
+        "CREATE TABLE IF NOT EXISTS archive_state (tbl TEXT PRIMARY KEY, horizon TEXT NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS archive_guard (active INTEGER)",
+        "DROP TRIGGER IF EXISTS trg_stats_task_delete",
+        """
+        CREATE TRIGGER trg_stats_task_delete AFTER DELETE ON tasks
+        WHEN OLD.assigned_to IS NOT NULL AND NOT EXISTS (SELECT 1 FROM archive_guard) BEGIN
+            UPDATE user_stats SET
+                tasks_total = tasks_total - 1,
+                tasks_completed = tasks_completed - COALESCE(OLD.completed, 0)
+            WHERE user_id = OLD.assigned_to;
+        END
+        """,
+        "DROP TRIGGER IF EXISTS trg_stats_wellness_delete",
+        """
+        CREATE TRIGGER trg_stats_wellness_delete AFTER DELETE ON wellness
+        WHEN OLD.user_id IS NOT NULL AND NOT EXISTS (SELECT 1 FROM archive_guard) BEGIN
+            UPDATE user_stats SET
+                wellness_count = wellness_count - 1,
+                stress_count = stress_count - (OLD.stress_level IS NOT NULL),
+                stress_sum = stress_sum - COALESCE(OLD.stress_level, 0)
+            WHERE user_id = OLD.user_id;
+            UPDATE user_stats SET (latest_stress, latest_stress_at) = (
+                SELECT stress_level, timestamp FROM wellness WHERE user_id = OLD.user_id
+                ORDER BY timestamp DESC, id DESC LIMIT 1)
+            WHERE user_id = OLD.user_id;
+        END
+        """,
+    ),
+    # 10: burnout-risk scores, replaced wholesale by each wellness_analytics run
+    (
+        """
+        CREATE TABLE IF NOT EXISTS burnout_scores (
+            user_id INTEGER PRIMARY KEY,
+            team_id INTEGER,
+            computed_at TEXT NOT NULL,
+            entries INTEGER NOT NULL,
+            avg_7d REAL,
+            avg_28d REAL,
+            slope REAL,
+            volatility REAL,
+            risk REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_burnout_team_risk ON burnout_scores(team_id, risk)",
+        "CREATE INDEX IF NOT EXISTS idx_burnout_risk ON burnout_scores(risk)",
+        """
+        CREATE TABLE IF NOT EXISTS team_burnout_scores (
+            team_id INTEGER PRIMARY KEY,
+            computed_at TEXT NOT NULL,
+            members INTEGER NOT NULL,
+            avg_risk REAL NOT NULL,
+            max_risk REAL NOT NULL,
+            at_risk INTEGER NOT NULL
+        )
+        """,
+    ),
+    # 11: due_date normalized to epoch seconds (UTC) for the due-date scheduler; a date-only
+    # due_date falls due at the following midnight. Unparseable text leaves due_ts NULL.
+    (
+        "ALTER TABLE tasks ADD COLUMN due_ts INTEGER GENERATED ALWAYS AS (" + DUE_TS_EXPR + ") VIRTUAL",
+        "ALTER TABLE tasks_archive ADD COLUMN due_ts INTEGER GENERATED ALWAYS AS (" + DUE_TS_EXPR + ") VIRTUAL",
+        "CREATE INDEX IF NOT EXISTS idx_tasks_open_due_ts ON tasks(due_ts) WHERE completed = 0",
+    ),
+    # 12: per-team employee cap, checked row by row so set-based membership updates are all-or-nothing
+    (
+        "ALTER TABLE teams ADD COLUMN max_members INTEGER NOT NULL DEFAULT 5",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_team_cap_update BEFORE UPDATE OF team_id ON users
+        WHEN NEW.team_id IS NOT NULL AND NEW.team_id IS NOT OLD.team_id AND NEW.role = 'user' BEGIN
+            SELECT RAISE(ABORT, 'team is full')
+            WHERE (SELECT COUNT(*) FROM users WHERE role = 'user' AND team_id = NEW.team_id)
+                  >= (SELECT max_members FROM teams WHERE id = NEW.team_id);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_team_cap_insert BEFORE INSERT ON users
+        WHEN NEW.team_id IS NOT NULL AND NEW.role = 'user' BEGIN
+            SELECT RAISE(ABORT, 'team is full')
+            WHERE (SELECT COUNT(*) FROM users WHERE role = 'user' AND team_id = NEW.team_id)
+                  >= (SELECT max_members FROM teams WHERE id = NEW.team_id);
+        END
+        """,
+    ),
+    # 13: feedback messages are encrypted at rest, so the search index can no longer copy them
+    # by trigger; feedback.py feeds it plaintext and it keeps no content of its own
+    (
+        "DROP TRIGGER IF EXISTS trg_feedback_fts_insert",
+        "DROP TRIGGER IF EXISTS trg_feedback_fts_delete",
+        "DROP TRIGGER IF EXISTS trg_feedback_fts_update",
+        "DROP TABLE IF EXISTS feedback_fts",
+        "CREATE VIRTUAL TABLE feedback_fts USING fts5(message, content='', prefix='2 3')",
+        "INSERT INTO feedback_fts(rowid, message) SELECT id, message FROM feedback WHERE typeof(message) = 'text'",  # full-scan
+    ),
+    # 14: the task form stored its picked date as a midnight timestamp, so due_ts fell a day early;
+    # such due dates were meant as whole days
+    (
+        "UPDATE tasks SET due_date = substr(due_date, 1, 10) WHERE due_date GLOB '????-??-??T00:00:00'",  # full-scan
+        "UPDATE tasks_archive SET due_date = substr(due_date, 1, 10) WHERE due_date GLOB '????-??-??T00:00:00'",  # full-scan
+    ),
+    # 15: the feedback index held every word of the encrypted messages in plaintext; rebuild it from
+    # keyed hashes (encryption.blind_terms), zeroing the freed pages of the old one
+    (
+        "PRAGMA secure_delete = ON",
+        "DROP TABLE IF EXISTS feedback_fts",
+        "CREATE VIRTUAL TABLE feedback_fts USING fts5(message, content='')",
+        _blind_feedback_index,
+        "PRAGMA secure_delete = OFF",
+    ),
+]
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{w}"*' for w in words)
+
+def schema_version(conn) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn):
     conn.commit()
-    conn.close()
\ No newline at end of file
+    version = schema_version(conn)
+    for target, steps in enumerate(MIGRATIONS[version:], version + 1):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # re-check under the write lock in case another process migrated first
+            if schema_version(conn) >= target:
+                conn.rollback()
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version={target}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+def init_db():
+    # on an up-to-date database startup costs one PRAGMA read and takes no write lock
+    with connection() as conn:
+        if schema_version(conn) < len(MIGRATIONS):
+            migrate(conn)
@@ -1,21 +1,228 @@
-from cryptography.fernet import Fernet
+import argparse
+import hashlib
+import hmac
+import os
+import re
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
 
-# Store key locally in file
+# Store key ring locally in file, one key per line; the first encrypts, all of them decrypt
 KEY_PATH = "secret.key"
 
+# Field-level encryption: values are stored as BLOB Fernet tokens; TEXT values are
+# plaintext written before encryption was enabled and are read back as-is
+DECRYPT_CACHE_SIZE = 1024
+DECRYPT_WORKERS = 4
+DECRYPT_BATCH = 64      # bulk reads smaller than this decrypt inline
+ROTATE_CHUNK = 500      # rows re-encrypted per write transaction
+# table -> encrypted column; hot tables before their archives, so rows archived mid-pass are still visited
+FIELDS = {"feedback": "message", "wellness": "notes", "wellness_archive": "notes"}
+
+# Blind search index: encrypted text is indexed as keyed hashes of its word prefixes, never as
+# words. The HMAC key is separate from the ring and not rotated with it (the index holds no
+# plaintext to re-protect); replacing it means rebuilding the index.
+SEARCH_KEY_PATH = "search.key"
+SEARCH_TOKEN_BYTES = 8
+SEARCH_MIN_PREFIX = 2   # single letters aren't indexed: their hashes would give away first letters
+
+_fernet = None
+_search_key = None
+_stamp = None           # (inode, mtime) of KEY_PATH when _fernet was built
+_pool = None
+_lock = threading.Lock()
+
+def load_keys():
+    from cryptography.fernet import Fernet
+    try:
+        keys = open(KEY_PATH, "rb").read().split()
+    except FileNotFoundError:
+        keys = []
+    if not keys:
+        keys = [Fernet.generate_key()]
+        _save_keys(keys)
+    return keys
+
 def load_key():
+    return load_keys()[0]
+
+def _save_keys(keys):
+    tmp = KEY_PATH + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(b"\n".join(keys) + b"\n")
+    os.replace(tmp, KEY_PATH)
+
+def _key_stamp():
     try:
-        return open(KEY_PATH, "rb").read()
+        st = os.stat(KEY_PATH)
     except FileNotFoundError:
-        key = Fernet.generate_key()
-        with open(KEY_PATH, "wb") as f:
-            f.write(key)
-        return key
+        return None
+    return st.st_ino, st.st_mtime_ns
+
+def get_fernet():
+    # cryptography and the key file are only touched on first use, not at import
+    global _fernet, _stamp
+    with _lock:
+        if _fernet is None:
+            from cryptography.fernet import Fernet, MultiFernet
+            _fernet = MultiFernet([Fernet(k) for k in load_keys()])
+            _stamp = _key_stamp()
+        return _fernet
 
-fernet = Fernet(load_key())
+def _reload_keys(stale):
+    """Drop a ring the key file no longer matches (another process rotated it); returns
+    whether a different ring is now in use."""
+    global _fernet
+    with _lock:
+        if _fernet is not stale:
+            return True
+        if _key_stamp() == _stamp:
+            return False
+        _fernet = None
+        return True
 
 def encrypt(data: bytes) -> bytes:
+    # always encrypt under the newest key on disk, so a rotation elsewhere isn't undone here
+    fernet = get_fernet()
+    if _key_stamp() != _stamp and _reload_keys(fernet):
+        fernet = get_fernet()
     return fernet.encrypt(data)
 
 def decrypt(token: bytes) -> bytes:
-    return fernet.decrypt(token)
\ No newline at end of file
+    from cryptography.fernet import InvalidToken
+    fernet = get_fernet()
+    try:
+        return fernet.decrypt(token)
+    except InvalidToken:
+        if not _reload_keys(fernet):
+            raise
+        return get_fernet().decrypt(token)
+
+def encrypt_field(text):
+    return None if text is None else encrypt(text.encode())
+
+@lru_cache(maxsize=DECRYPT_CACHE_SIZE)
+def _decrypt_cached(token):
+    return decrypt(token).decode()
+
+def decrypt_field(value, cache=True):
+    if isinstance(value, bytes):
+        return _decrypt_cached(value) if cache else decrypt(value).decode()
+    return value
+
+def _decrypt_chunk(values, cache=True):
+    return [decrypt_field(v, cache) for v in values]
+
+def _get_pool():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(DECRYPT_WORKERS, thread_name_prefix="decrypt")
+        return _pool
+
+def decrypt_many(values, cache=True):
+    """Decrypt column values in order; large reads are split into batches on the decrypt pool.
+    One-off bulk reads pass cache=False so they don't evict what the UI keeps showing."""
+    values = list(values)
+    if len(values) < DECRYPT_BATCH:
+        return _decrypt_chunk(values, cache)
+    chunks = (values[i:i + DECRYPT_BATCH] for i in range(0, len(values), DECRYPT_BATCH))
+    return [text for chunk in _get_pool().map(_decrypt_chunk, chunks, repeat(cache)) for text in chunk]
+
+def _load_search_key():
+    global _search_key
+    with _lock:
+        if _search_key is None:
+            try:
+                key = open(SEARCH_KEY_PATH, "rb").read().strip()
+            except FileNotFoundError:
+                key = b""
+            if not key:
+                key = os.urandom(32).hex().encode()
+                tmp = SEARCH_KEY_PATH + ".tmp"
+                with open(tmp, "wb") as f:
+                    f.write(key + b"\n")
+                os.replace(tmp, SEARCH_KEY_PATH)
+            _search_key = key
+        return _search_key
+
+def _words(text):
+    # folded like FTS5's unicode61 tokenizer, so case and accents don't matter
+    text = unicodedata.normalize("NFKD", (text or "").casefold())
+    return re.findall(r"\w+", "".join(c for c in text if not unicodedata.combining(c)))
+
+def _blind(term, key):
+    return hmac.new(key, term.encode(), hashlib.sha256).hexdigest()[:2 * SEARCH_TOKEN_BYTES]
+
+def blind_terms(text):
+    """Index form of text: a keyed hash per word prefix, so prefix searches still match."""
+    key = _search_key or _load_search_key()
+    return " ".join(_blind(w[:n], key) for w in _words(text) for n in range(SEARCH_MIN_PREFIX, len(w) + 1))
+
+def blind_query(text):
+    """FTS5 query for rows containing every word of text as a prefix ('' if nothing searchable)."""
+    key = _search_key or _load_search_key()
+    return " ".join(f'"{_blind(w, key)}"' for w in _words(text) if len(w) >= SEARCH_MIN_PREFIX)
+
+def _reencrypt_chunk(conn, table, column, after, limit, fernet, plaintext_only):
+    only = f" AND typeof({column}) = 'text'" if plaintext_only else ""
+    rows = conn.execute(f"SELECT id, {column} FROM {table} WHERE id > ? AND {column} IS NOT NULL{only} ORDER BY id LIMIT ?",
+                        (after, limit)).fetchall()
+    conn.executemany(f"UPDATE {table} SET {column} = ? WHERE id = ?",
+                     ((fernet.rotate(v) if isinstance(v, bytes) else fernet.encrypt(v.encode()), i) for i, v in rows))
+    return (rows[-1][0] if rows else after), len(rows)
+
+def reencrypt(table, column, chunk=ROTATE_CHUNK, plaintext_only=False):
+    """Rewrite every value of table.column under the newest key, encrypting legacy plaintext too
+    (or, with plaintext_only, just encrypt the legacy rows and leave tokens alone).
+    Each chunk is its own short write, so readers (WAL) are never blocked; returns the row count."""
+    from database import write
+    fernet = get_fernet()
+    after = total = 0
+    while True:
+        after, n = write(_reencrypt_chunk, table, column, after, chunk, fernet, plaintext_only)
+        total += n
+        if n < chunk:
+            return total
+
+def reencrypt_all(chunk=ROTATE_CHUNK, plaintext_only=False):
+    return {table: reencrypt(table, column, chunk, plaintext_only) for table, column in FIELDS.items()}
+
+def rotate_key(retire=False, chunk=ROTATE_CHUNK):
+    """Put a new key at the front of the ring and re-encrypt every field with it.
+    Old keys stay in the ring (so anything written meanwhile still decrypts) unless
+    retire is set; only retire when no other process holds the old ring."""
+    global _fernet
+    from cryptography.fernet import Fernet
+    with _lock:
+        keys = [Fernet.generate_key()] + load_keys()
+        _save_keys(keys)
+        _fernet = None
+    counts = reencrypt_all(chunk)
+    if retire:
+        with _lock:
+            _save_keys(keys[:1])
+            _fernet = None
+    return counts
+
+def main(argv=None):
+    from database import init_db, shutdown
+    ap = argparse.ArgumentParser(description="Encrypt sensitive columns and rotate the key ring")
+    ap.add_argument("action", choices=["encrypt", "rotate"],
+                    help="encrypt: encrypt legacy plaintext under the current key; rotate: add a new key and re-encrypt")
+    ap.add_argument("--retire", action="store_true", help="drop old keys once the rotation pass is done")
+    ap.add_argument("--chunk-size", type=int, default=ROTATE_CHUNK)
+    args = ap.parse_args(argv)
+    init_db()
+    if args.action == "rotate":
+        counts, verb = rotate_key(args.retire, args.chunk_size), "re-encrypted"
+    else:
+        counts, verb = reencrypt_all(args.chunk_size, plaintext_only=True), "encrypted"
+    for table, n in counts.items():
+        print(f"{table}: {n} row(s) {verb}")
+    shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import archive
+import events
+from database import connection, own_connections, snapshot
+
+EVALUATION_WORKERS = 4
+
+# One grouped pass over tasks, wellness and the points ledger for every member of a team.
+# :start/:end are inclusive ISO dates; tasks are scoped by due date.
+SCORECARD_SQL = """
+WITH members AS (SELECT id, username FROM users WHERE team_id = :team),
+t AS (
+    SELECT assigned_to AS user_id,
+           SUM(type = 'task') AS tasks, SUM(type = 'task' AND completed) AS tasks_done,
+           SUM(completed AND completed_at IS NOT NULL) AS timed,
+           SUM(completed AND date(completed_at) <= date(due_date)) AS on_time,
+           SUM(type = 'goal') AS goals, SUM(type = 'goal' AND completed) AS goals_done
+    FROM tasks
+    WHERE assigned_to IN (SELECT id FROM members) AND due_date >= :start AND due_date < date(:end, '+1 day')
+    GROUP BY assigned_to),
+w AS (
+    SELECT user_id, COUNT(stress_level) AS stress_entries, AVG(stress_level) AS avg_stress
+    FROM wellness
+    WHERE user_id IN (SELECT id FROM members) AND timestamp >= :start AND timestamp < date(:end, '+1 day')
+    GROUP BY user_id),
+p AS (
+    SELECT user_id, SUM(delta) AS points_earned
+    FROM points_ledger
+    WHERE user_id IN (SELECT id FROM members) AND reason = 'earn'
+      AND created_at >= :start AND created_at < date(:end, '+1 day')
+    GROUP BY user_id)
+SELECT m.id AS user_id, m.username,
+       COALESCE(t.tasks, 0) AS tasks, COALESCE(t.tasks_done, 0) AS tasks_done,
+       COALESCE(t.timed, 0) AS timed, COALESCE(t.on_time, 0) AS on_time,
+       COALESCE(t.goals, 0) AS goals, COALESCE(t.goals_done, 0) AS goals_done,
+       COALESCE(w.stress_entries, 0) AS stress_entries, w.avg_stress,
+       COALESCE(p.points_earned, 0) AS points_earned
+FROM members m
+LEFT JOIN t ON t.user_id = m.id
+LEFT JOIN w ON w.user_id = m.id
+LEFT JOIN p ON p.user_id = m.id
+ORDER BY m.username
+"""
+
+def _ratio(num, den):
+    return num / den if den else None
+
+def _score(row):
+    return {
+        **row,
+        "completion_rate": _ratio(row['tasks_done'], row['tasks']),
+        "on_time_rate": _ratio(row['on_time'], row['timed']),
+        "goal_attainment": _ratio(row['goals_done'], row['goals']),
+    }
+
+def _team_total(members):
+    keys = ("tasks", "tasks_done", "timed", "on_time", "goals", "goals_done", "stress_entries", "points_earned")
+    total = {k: sum(m[k] for m in members) for k in keys}
+    stress = sum(m['avg_stress'] * m['stress_entries'] for m in members if m['avg_stress'] is not None)
+    total["avg_stress"] = _ratio(stress, total['stress_entries'])
+    return _score(total)
+
+_cache = {}          # (team_id, start, end) -> scorecard
+_version = 0         # bumped by every invalidation; a card computed across one isn't stored
+_lock = threading.Lock()
+
+@own_connections
+def team_scorecard(team_id, start, end):
+    """{'team': totals, 'members': [per-member rows]} for start..end (inclusive ISO dates).
+    Cache hits take no connection; a miss is computed on a read-only snapshot."""
+    key = (team_id, start, end)
+    with _lock:
+        hit = _cache.get(key)
+        version = _version  # taken before the snapshot's first read, as in RosterCache
+    if hit is not None:
+        return hit
+    with snapshot() as conn:
+        # periods reaching past the archive horizon read both tiers; SQLite cannot push the
+        # member subquery into the union, so such historical cards cost a scan (and are cached)
+        sql = archive.with_archive(conn, SCORECARD_SQL, start, "tasks", "wellness")
+        rows = conn.execute(sql, {"team": team_id, "start": start, "end": end}).fetchall()
+    members = [_score(dict(r)) for r in rows]
+    card = {"team_id": team_id, "start": start, "end": end, "team": _team_total(members), "members": members}
+    with _lock:
+        if version == _version:
+            _cache[key] = card
+    return card
+
+@own_connections
+def company_scorecards(start, end, workers=EVALUATION_WORKERS):
+    """Scorecards for every team, computed in parallel on pooled connections.
+    Each card is its own snapshot; the team list's connection is released before the fan-out
+    (async_data doesn't hold one for the call either), so workers never wait on a slot held
+    by their caller."""
+    with connection() as conn:
+        team_ids = [r[0] for r in conn.execute("SELECT id FROM teams")]
+    with ThreadPoolExecutor(workers) as pool:
+        return dict(zip(team_ids, pool.map(lambda tid: team_scorecard(tid, start, end), team_ids)))
+
+def invalidate_team(team_id):
+    global _version
+    with _lock:
+        _version += 1
+        for key in [k for k in _cache if k[0] == team_id]:
+            del _cache[key]
+
+def invalidate_user(user_id):
+    # drop every cached card the user appears in; their team may have changed since
+    global _version
+    with _lock:
+        _version += 1
+        for key in [k for k, card in _cache.items() if any(m['user_id'] == user_id for m in card['members'])]:
+            del _cache[key]
+
+def _on_team_changed(e):
+    invalidate_team(e.team_id)
+    for uid in e.user_ids:
+        invalidate_user(uid)
+
+events.subscribe(events.TaskChanged, lambda e: invalidate_user(e.user_id))
+events.subscribe(events.WellnessLogged, lambda e: invalidate_user(e.user_id))
+events.subscribe(events.PointsChanged, lambda e: invalidate_user(e.user_id))
+events.subscribe(events.TeamChanged, _on_team_changed)
@@ -0,0 +1,92 @@
+import logging
+import threading
+from dataclasses import dataclass
+
+log = logging.getLogger("events")
+
+# Change events published by the write functions after their transaction commits.
+# user_id is the user whose data changed (or who made a catalogue change).
+
+@dataclass(frozen=True)
+class Event:
+    pass
+
+@dataclass(frozen=True)
+class TaskChanged(Event):
+    user_id: int
+    task_id: int
+
+@dataclass(frozen=True)
+class TaskDueSoon(Event):
+    user_id: int
+    task_id: int
+    due_ts: int  # epoch seconds
+
+@dataclass(frozen=True)
+class TaskOverdue(Event):
+    user_id: int
+    task_id: int
+    due_ts: int
+
+@dataclass(frozen=True)
+class WellnessLogged(Event):
+    user_id: int
+
+@dataclass(frozen=True)
+class PointsChanged(Event):
+    user_id: int
+    balance: int
+    version: int  # id of the ledger row that produced the balance
+
+@dataclass(frozen=True)
+class RewardsChanged(Event):
+    user_id: int
+
+@dataclass(frozen=True)
+class UserCreated(Event):
+    user_id: int
+
+@dataclass(frozen=True)
+class TeamChanged(Event):
+    team_id: int
+    user_ids: tuple = ()  # users who joined or left the team
+
+@dataclass(frozen=True)
+class FeedbackSubmitted(Event):
+    user_id: int
+
+@dataclass(frozen=True)
+class TrainingChanged(Event):
+    user_id: int
+
+class EventBus:
+    """In-process publish/subscribe; handlers run synchronously in the publishing thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers = {}  # event type -> list of handlers
+
+    def subscribe(self, event_type, handler):
+        # subscribing to Event receives everything; returns a callable that unsubscribes
+        with self._lock:
+            self._handlers.setdefault(event_type, []).append(handler)
+        def unsubscribe():
+            with self._lock:
+                handlers = self._handlers.get(event_type, [])
+                if handler in handlers:
+                    handlers.remove(handler)
+        return unsubscribe
+
+    def publish(self, event):
+        with self._lock:
+            handlers = [h for cls in type(event).__mro__ for h in self._handlers.get(cls, ())]
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception:
+                # one broken subscriber must not fail the write that published the event
+                log.exception("handler %r failed for %r", handler, event)
+
+BUS = EventBus()
+subscribe = BUS.subscribe
+publish = BUS.publish
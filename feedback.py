@@ -1,13 +1,56 @@
+import json
 import sqlite3
-from database import get_conn
+import encryption
+import events
+from database import connection, reporting, write
+
+# Messages are stored encrypted; listings return metadata only and bodies are decrypted
+# on demand for the rows actually shown (get_messages / with_messages)
+
+def insert_feedback(conn, rows):
+    """Insert (from_user, message, timestamp) rows, indexing keyed hashes of the words for search."""
+    for from_user, message, timestamp in rows:
+        cur = conn.execute("INSERT INTO feedback(from_user,message,timestamp) VALUES(?,?,COALESCE(?,CURRENT_TIMESTAMP))",
+                           (from_user, encryption.encrypt_field(message), timestamp))
+        conn.execute("INSERT INTO feedback_fts(rowid,message) VALUES(?,?)", (cur.lastrowid, encryption.blind_terms(message)))
 
 def submit_feedback(from_user, message):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("INSERT INTO feedback(from_user,message) VALUES(?,?)", (from_user,message))
-    conn.commit(); conn.close()
-
-def get_feedback():  # manager view
-    conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT id,message,timestamp FROM feedback ORDER BY timestamp DESC")
-    fb = c.fetchall(); conn.close()
-    return fb
\ No newline at end of file
+    write(insert_feedback, [(from_user, message, None)])
+    events.publish(events.FeedbackSubmitted(from_user))
+
+@reporting
+def get_feedback(limit=None, offset=0):  # manager view
+    q = "SELECT id,timestamp FROM feedback ORDER BY timestamp DESC"
+    params = []
+    if limit:
+        q += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    with connection() as conn:
+        return conn.execute(q, params).fetchall()
+
+@reporting
+def search_feedback(text, limit=20, offset=0, ranked=True):
+    # Words match as prefixes; ranked orders by bm25, otherwise newest first (cheaper for common words)
+    match = encryption.blind_query(text)
+    if not match:
+        return get_feedback(limit, offset)
+    order = "feedback_fts.rank" if ranked else "feedback_fts.rowid DESC"
+    with connection() as conn:
+        return conn.execute(f"""
+            SELECT f.id, f.timestamp FROM feedback_fts
+            JOIN feedback f ON f.id = feedback_fts.rowid
+            WHERE feedback_fts MATCH ? ORDER BY {order} LIMIT ? OFFSET ?""", (match, limit, offset)).fetchall()
+
+@reporting
+def get_messages(ids):
+    """Decrypted message bodies as {id: message}."""
+    with connection() as conn:
+        rows = conn.execute("SELECT id,message FROM feedback WHERE id IN (SELECT value FROM json_each(?))",
+                            (json.dumps(list(ids)),)).fetchall()
+    return dict(zip((r[0] for r in rows), encryption.decrypt_many(r[1] for r in rows)))
+
+@reporting
+def with_messages(rows):
+    """Listing rows as dicts with their decrypted message added."""
+    messages = get_messages(r['id'] for r in rows)
+    return [dict(r, message=messages.get(r['id'])) for r in rows]
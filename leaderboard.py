@@ -0,0 +1,113 @@
+import threading
+from bisect import bisect_left, insort
+import events
+from database import connection
+
+class Leaderboard:
+    """Global and per-team rankings kept as sorted (-balance, user_id) lists.
+
+    Loaded once from the database, then updated in place on every balance or
+    team change, so top() is a slice rather than a sort.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._users = {}        # user_id -> (balance, team_id, username)
+        self._versions = {}     # user_id -> id of the last ledger row applied
+        self._global = []
+        self._teams = {}
+
+    def _load(self):
+        # one statement, so each balance and the ledger id it reflects come from the same state
+        with connection() as conn:
+            rows = conn.execute(
+                "SELECT p.user_id, p.balance, u.team_id, u.username, "
+                "(SELECT MAX(l.id) FROM points_ledger l WHERE l.user_id = p.user_id) AS version "
+                "FROM points p JOIN users u ON u.id = p.user_id"  # full-scan
+            ).fetchall()
+        for r in rows:
+            self._place(r['user_id'], r['balance'], r['team_id'], r['username'])
+            if r['version'] is not None:
+                self._versions[r['user_id']] = r['version']
+        self._loaded = True
+
+    def _unplace(self, user_id):
+        old = self._users.pop(user_id, None)
+        if old is None:
+            return
+        key = (-old[0], user_id)
+        for ranking in (self._global, self._teams.get(old[1])):
+            if ranking is not None:
+                i = bisect_left(ranking, key)
+                if i < len(ranking) and ranking[i] == key:
+                    del ranking[i]
+
+    def _place(self, user_id, balance, team_id, username):
+        self._users[user_id] = (balance, team_id, username)
+        insort(self._global, (-balance, user_id))
+        if team_id is not None:
+            insort(self._teams.setdefault(team_id, []), (-balance, user_id))
+
+    def set_balance(self, user_id, balance, version=None):
+        """Apply a committed balance; version (the ledger row id) drops out-of-order updates."""
+        with self._lock:
+            if not self._loaded:
+                return
+            if version is not None:
+                if version <= self._versions.get(user_id, 0):
+                    return
+                self._versions[user_id] = version
+            old = self._users.get(user_id)
+            if old is None:
+                team_id, username = self._lookup(user_id)
+            else:
+                team_id, username = old[1], old[2]
+            self._unplace(user_id)
+            self._place(user_id, balance, team_id, username)
+
+    def add_user(self, user_id):
+        """Rank a newly signed-up user, who starts at a zero balance."""
+        with self._lock:
+            if not self._loaded or user_id in self._users:
+                return
+            team_id, username = self._lookup(user_id)
+            if username is not None:
+                self._place(user_id, 0, team_id, username)
+
+    def refresh_user(self, user_id):
+        """Re-read one user's balance and team, e.g. after a team reassignment."""
+        with self._lock:
+            if not self._loaded:
+                return
+            with connection() as conn:
+                row = conn.execute(
+                    "SELECT p.balance, u.team_id, u.username FROM users u JOIN points p ON p.user_id = u.id WHERE u.id=?",
+                    (user_id,)).fetchone()
+            self._unplace(user_id)
+            if row:
+                self._place(user_id, row['balance'], row['team_id'], row['username'])
+
+    def _lookup(self, user_id):
+        with connection() as conn:
+            row = conn.execute("SELECT team_id, username FROM users WHERE id=?", (user_id,)).fetchone()
+        return (row['team_id'], row['username']) if row else (None, None)
+
+    def top(self, k=10, team_id=None):
+        """[(user_id, username, balance)] for the k highest balances, globally or in one team."""
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            ranking = self._global if team_id is None else self._teams.get(team_id, [])
+            return [(uid, self._users[uid][2], -neg) for neg, uid in ranking[:k]]
+
+    def reset(self):
+        with self._lock:
+            self._loaded = False
+            self._users.clear(); self._versions.clear(); self._global.clear(); self._teams.clear()
+
+LEADERBOARD = Leaderboard()
+
+events.subscribe(events.PointsChanged, lambda e: LEADERBOARD.set_balance(e.user_id, e.balance, e.version))
+events.subscribe(events.TeamChanged, lambda e: [LEADERBOARD.refresh_user(uid) for uid in e.user_ids])
+events.subscribe(events.UserCreated, lambda e: LEADERBOARD.add_user(e.user_id))
@@ -1,132 +1,311 @@
+import asyncio
+import importlib
+import sqlite3
 import flet as ft
-from dashboard import dashboard_view
-from auth import login, signup, get_user
+import events
+import profiling
+import async_data as db
+from events import TaskChanged, TaskDueSoon, TaskOverdue, WellnessLogged, PointsChanged, RewardsChanged, TeamChanged, FeedbackSubmitted, TrainingChanged
+from auth import login_async, signup_async, get_user
 from ui_utils import validate_username, validate_password
-from tasks import create_task, get_tasks, toggle_complete
-from wellness import log_wellness, get_wellness
-from feedback import submit_feedback, get_feedback
-from training import list_resources, add_resource
-from team import get_team_members, get_available_employees, create_team, edit_team
-from rewards import get_balance, list_rewards, redeem_reward, add_reward
+
+def lazy_page(module, name):
+    # page modules (and the flet chart classes they pull in) load on first navigation
+    async def build(page, user, **kwargs):
+        return await getattr(importlib.import_module(module), name)(page, user, **kwargs)
+    return build
+
+dashboard_view = lazy_page("dashboard", "dashboard_view")
 
 # Tasks & Goals Page with creation dialog
-def tasks_page(page, user, **kwargs):
-    lst = ft.ListView(expand=1, spacing=8)
-    def load_tasks():
-        lst.controls.clear()
-        for t in get_tasks(user['id']):
-            cb = ft.Checkbox(
-                label=f"[{t['type']}] {t['title']} (Due: {t['due_date']})",
-                value=bool(t['completed']),
-                on_change=lambda e, id=t['id']: (toggle_complete(id, user['id']), load_tasks(), page.update())
-            )
-            lst.controls.append(cb)
-    load_tasks()
+TASK_PAGE_SIZE = 50
+
+async def tasks_page(page, user, type_='task', **kwargs):
+    # Rows are fetched a page at a time by keyset and toggles update only their own Checkbox
+    rows = {}
+    cursor = {"after": None, "done": False}
+    hide_done = ft.Switch(label="Hide completed", value=False)
+    lst = ft.ListView(expand=1, spacing=8, item_extent=40, on_scroll_interval=100)
+    def task_row(t):
+        return ft.Checkbox(
+            label=f"[{t['type']}] {t['title']} (Due: {t['due_date']})",
+            value=bool(t['completed']),
+            on_change=lambda e, id=t['id']: page.run_task(toggle, id)
+        )
+    async def load_more():
+        if cursor['done']: return
+        batch = await db.tasks.get_tasks(user['id'], type_=type_, include_completed=not hide_done.value, after_id=cursor['after'], limit=TASK_PAGE_SIZE)
+        for t in batch:
+            rows[t['id']] = task_row(t)
+            lst.controls.append(rows[t['id']])
+        if batch: cursor['after'] = batch[-1]['id']
+        cursor['done'] = len(batch) < TASK_PAGE_SIZE
+    async def load_tasks():
+        lst.controls.clear(); rows.clear(); cursor.update(after=None, done=False)
+        await load_more()
+    async def toggle(task_id):
+        await db.tasks.toggle_complete(task_id, user['id'])
+        t = await db.tasks.get_task(task_id)
+        cb = rows.get(task_id)
+        if t and cb:
+            cb.value = bool(t['completed']); cb.update()
+    async def on_scroll(e):
+        if not cursor['done'] and e.pixels >= e.max_scroll_extent - 200:
+            await load_more(); lst.update()
+    async def on_hide(e):
+        await load_tasks(); page.update()
+    lst.on_scroll = on_scroll
+    hide_done.on_change = on_hide
+    await load_tasks()
 
     title_f = ft.TextField(label="Title", width=300)
     desc_f = ft.TextField(label="Description", multiline=True, width=300)
     date_p = ft.DatePicker(label="Due Date", width=300)
-    type_dd = ft.Dropdown(label="Type", options=[ft.dropdown.Option("task"), ft.dropdown.Option("goal")])
+    type_dd = ft.Dropdown(label="Type", value=type_, options=[ft.dropdown.Option("task"), ft.dropdown.Option("goal")])
     assignee_opts = ([ft.dropdown.Option(user['username'], key=user['id'])] if user['role']=='user'
-        else [ft.dropdown.Option(u['username'], key=u['id']) for u in get_available_employees()]+[ft.dropdown.Option(user['username'], key=user['id'])])
+        else [ft.dropdown.Option(u['username'], key=u['id']) for u in await db.team.get_available_employees()]+[ft.dropdown.Option(user['username'], key=user['id'])])
     assignee_dd = ft.Dropdown(label="Assign To", width=300, options=assignee_opts)
 
-    def submit_task(e):
-        create_task(title_f.value, desc_f.value, assignee_dd.value, date_p.value.isoformat(), type_dd.value)
-        title_f.value=desc_f.value=""; date_p.value=None; type_dd.value=None; assignee_dd.value=None
-        page.dialog.open=False; load_tasks(); page.update()
+    async def submit_task(e):
+        await db.tasks.create_task(title_f.value, desc_f.value, assignee_dd.value, date_p.value.date().isoformat(), type_dd.value)
+        title_f.value=desc_f.value=""; date_p.value=None; type_dd.value=type_; assignee_dd.value=None
+        show_dialog(False); await load_tasks(); page.update()
 
+    def show_dialog(open):
+        # page.dialog is shared by every cached page, so point it back at this page's form first
+        page.dialog = dialog; dialog.open = open; page.update()
     dialog = ft.AlertDialog(
         title=ft.Text("New Task/Goal"),
         content=ft.Column([title_f, desc_f, date_p, type_dd, assignee_dd], tight=True),
         actions=[
-            ft.TextButton("Cancel", on_click=lambda e: (setattr(page.dialog,'open',False), page.update())),
+            ft.TextButton("Cancel", on_click=lambda e: show_dialog(False)),
             ft.ElevatedButton("Create", on_click=submit_task)
         ]
     )
-    page.dialog = dialog
-    add_btn = ft.FloatingActionButton(icon=ft.icons.ADD, on_click=lambda e: (setattr(page.dialog,'open',True), page.update()))
-    return ft.Stack([lst, add_btn], expand=1)
+    add_btn = ft.FloatingActionButton(icon=ft.icons.ADD, on_click=lambda e: show_dialog(True))
+    return ft.Stack([ft.Column([hide_done, lst], expand=1), add_btn], expand=1)
+
+# Search-backed paged list shared by the Feedback and Training pages
+SEARCH_PAGE_SIZE = 20
+
+async def search_list(page, search, row_view, hint, expand=None):
+    state = {"offset": 0, "text": ""}
+    lst = ft.ListView(expand=1, spacing=6)
+    more = ft.TextButton("Load more", visible=False)
+    async def load(reset=False):
+        if reset:
+            state['offset'] = 0; lst.controls.clear()
+        rows = await search(state['text'], SEARCH_PAGE_SIZE, state['offset'])
+        if expand:  # fill in row details (e.g. decrypted bodies) for just this page
+            rows = await expand(rows)
+        lst.controls.extend(row_view(r) for r in rows)
+        state['offset'] += len(rows)
+        more.visible = len(rows) == SEARCH_PAGE_SIZE
+    async def on_search(e):
+        state['text'] = box.value; await load(reset=True); page.update()
+    async def on_more(e):
+        await load(); page.update()
+    box = ft.TextField(label=hint, prefix_icon=ft.icons.SEARCH, on_submit=on_search, on_change=on_search)
+    more.on_click = on_more
+    await load(reset=True)
+    return ft.Column([box, lst, more], expand=1), lambda: load(reset=True)
+
+# Feedback Page: anyone can submit; managers search all feedback
+async def feedback_page(page, user, **kwargs):
+    msg_f = ft.TextField(label="Your feedback", multiline=True)
+    async def send(e):
+        if not msg_f.value: return
+        await db.feedback.submit_feedback(user['id'], msg_f.value); msg_f.value = ""
+        if refresh: await refresh()
+        page.snack_bar = ft.SnackBar(ft.Text("Feedback sent.")); page.snack_bar.open = True; page.update()
+    controls, refresh = [msg_f, ft.ElevatedButton("Send", on_click=send)], None
+    if user['role'] == 'manager':
+        results, refresh = await search_list(page, db.feedback.search_feedback,
+            lambda r: ft.ListTile(title=ft.Text(r['message']), subtitle=ft.Text(r['timestamp'])), "Search feedback",
+            expand=db.feedback.with_messages)
+        controls += [ft.Divider(), results]
+    # data: lets home_view reload just the list on new feedback, keeping what is typed in msg_f
+    return ft.Column(controls, expand=1, data=refresh)
+
+# Training Page: searchable catalogue; managers add resources
+async def training_page(page, user, **kwargs):
+    results, refresh = await search_list(page, db.training.search_resources,
+        lambda r: ft.ListTile(title=ft.Text(r['title']), subtitle=ft.Text(r['url']), on_click=lambda e, url=r['url']: page.launch_url(url)),
+        "Search resources")
+    controls = [results]
+    if user['role'] == 'manager':
+        title_f = ft.TextField(label="Title", expand=1); url_f = ft.TextField(label="URL", expand=1)
+        async def add(e):
+            if not (title_f.value and url_f.value): return
+            await db.training.add_resource(title_f.value, url_f.value, user['id']); title_f.value = url_f.value = ""
+            await refresh(); page.update()
+        controls.insert(0, ft.Row([title_f, url_f, ft.ElevatedButton("Add", on_click=add)]))
+    return ft.Column(controls, expand=1)
 
 # Teams Page: Full Management Form
-def teams_page(page, user, **kwargs):
-    import sqlite3
-    from database import get_conn
+async def teams_page(page, user, **kwargs):
     if user['role']!='manager': return ft.Text("Only managers can manage teams.")
     team_id=user['team_id']
     if not team_id:
         name_f=ft.TextField(label="Team Name")
-        avail=get_available_employees()
+        avail=await db.team.get_available_employees()
         checkboxes=[ft.Checkbox(label=u['username'],key=u['id']) for u in avail]
-        def create(e):
+        async def create(e):
             selected=[cb.key for cb in checkboxes if cb.value]
-            if len(selected)>5:
-                page.snack_bar=ft.SnackBar(ft.Text("Max 5 members."));page.snack_bar.open=True;page.update();return
-            tid=create_team(name_f.value,user['id'],selected)
-            page.snack_bar=ft.SnackBar(ft.Text(f"Team created (ID: {tid})"));page.snack_bar.open=True;page.update()
+            try: msg=f"Team created (ID: {await db.team.create_team(name_f.value,user['id'],selected)})"
+            except sqlite3.IntegrityError as ex: msg=f"Could not create team: {ex}"
+            page.snack_bar=ft.SnackBar(ft.Text(msg));page.snack_bar.open=True;page.update()
         return ft.Column([name_f,*checkboxes,ft.ElevatedButton("Create Team",on_click=create)],spacing=10)
-    members=get_team_members(team_id)
-    avail=get_available_employees()
+    members,avail=await asyncio.gather(db.team.get_team_members(team_id),db.team.get_available_employees())
     name_f=ft.TextField(label="Team Name")
-    def rename(e):
-        edit_team(team_id,new_name=name_f.value)
+    async def rename(e):
+        await db.team.edit_team(team_id,new_name=name_f.value)
         page.snack_bar=ft.SnackBar(ft.Text("Team renamed."));page.snack_bar.open=True;page.update()
-    remove_list=[ft.Row([ft.Text(m['username']),ft.IconButton(ft.icons.REMOVE_CIRCLE,on_click=lambda e,uid=m['id']:(edit_team(team_id,remove_ids=[uid]),page.update()))]) for m in members]
-    add_list=[ft.Row([ft.Text(u['username']),ft.IconButton(ft.icons.ADD_CIRCLE,on_click=lambda e,uid=u['id']:(len(get_team_members(team_id))<5 and edit_team(team_id,add_ids=[uid]) or None,page.update()))]) for u in avail]
-    def delete(e):
-        for m in members: edit_team(team_id,remove_ids=[m['id']])
-        conn=get_conn();c=conn.cursor();c.execute("DELETE FROM teams WHERE id=?",(team_id,));conn.commit();conn.close()
+    async def remove(uid):
+        await db.team.edit_team(team_id,remove_ids=[uid]);page.update()
+    async def add(uid):
+        # the member cap is checked by the database in the same statement that adds the user
+        try: await db.team.edit_team(team_id,add_ids=[uid])
+        except sqlite3.IntegrityError as ex:
+            page.snack_bar=ft.SnackBar(ft.Text(str(ex).capitalize()));page.snack_bar.open=True
+        page.update()
+    remove_list=[ft.Row([ft.Text(m['username']),ft.IconButton(ft.icons.REMOVE_CIRCLE,on_click=lambda e,uid=m['id']:page.run_task(remove,uid))]) for m in members]
+    add_list=[ft.Row([ft.Text(u['username']),ft.IconButton(ft.icons.ADD_CIRCLE,on_click=lambda e,uid=u['id']:page.run_task(add,uid))]) for u in avail]
+    async def delete(e):
+        await db.team.delete_team(team_id)
         page.snack_bar=ft.SnackBar(ft.Text("Team deleted."));page.snack_bar.open=True;page.update()
     return ft.Column([name_f,ft.ElevatedButton("Rename Team",on_click=rename),ft.Text("Members:"),*remove_list,ft.Text("Add Members:"),*add_list,ft.Divider(),ft.ElevatedButton("Delete Team",bgcolor=ft.colors.ERROR,on_click=delete)],spacing=8)
 
+# Diagnostics Page: query and page-build timings (manager only, APP_PROFILE=1)
+async def diagnostics_page(page, user, **kwargs):
+    rep=profiling.report(top=25)
+    ms=lambda s: f"{s['p50_ms']:.1f} / {s['p95_ms']:.1f} / {s['p99_ms']:.1f}"
+    def table(cols, rows):
+        return ft.DataTable(columns=[ft.DataColumn(ft.Text(c)) for c in cols],
+            rows=[ft.DataRow(cells=[ft.DataCell(ft.Text(str(v))) for v in r]) for r in rows])
+    pages=table(["Page","Builds","p50 / p95 / p99 ms"],[(l,s['count'],ms(s)) for l,s in rep['pages'].items()])
+    queries=table(["Query","Calls","Rows","p50 / p95 / p99 ms","Top call site"],
+        [(q['sql'][:80],q['count'],q.get('rows',0),ms(q),next(iter(q.get('call_sites',{})),'')) for q in rep['queries']])
+    def dump(e):
+        profiling.dump("profile.json")
+        page.snack_bar=ft.SnackBar(ft.Text("Wrote profile.json"));page.snack_bar.open=True;page.update()
+    return ft.Column([ft.Text(f"Slow query threshold: {rep['slow_query_ms']:.0f} ms"),pages,queries,
+        ft.Row([ft.ElevatedButton("Dump JSON",on_click=dump),ft.TextButton("Reset",on_click=lambda e:(profiling.reset(),page.update()))])],
+        scroll=ft.ScrollMode.AUTO,spacing=12)
+
 # Navigation & Main app
-def home_view(page, token):
+async def home_view(page, token):
     user=get_user(token)
     role=user['role']
+    me=user['id']
     page.views.clear()
     page.appbar=ft.AppBar(title=ft.Text(f"Welcome, {user['username']}"))
     content=ft.Container(expand=1)
     nav=ft.NavigationBar()
+    # Which change events make a built page stale for this session (None: never cached)
+    mine=lambda *types: lambda e: isinstance(e,types) and e.user_id==me
+    anyof=lambda *types: lambda e: isinstance(e,types)
+    either=lambda *preds: lambda e: any(p(e) for p in preds)
+    never=lambda e: False
+    manager=role=='manager'
+    # only a manager's task form lists other employees, and only a manager's feedback page lists feedback
+    tasks_stale=either(mine(TaskChanged),anyof(TeamChanged)) if manager else mine(TaskChanged)
     PAGES=[
-        ("Dashboard",ft.icons.DASHBOARD,dashboard_view),
-        ("Tasks",ft.icons.TASK,tasks_page),
-        ("Goals",ft.icons.FLAG,tasks_page),
-        ("Wellness",ft.icons.HEALTH_AND_SAFETY,lambda p,u,**k: wellness_view(p,u)),
-        ("Feedback",ft.icons.FEEDBACK,feedback_page),
-        ("Training",ft.icons.SCHOOL,training_page),
-        ("Teams",ft.icons.GROUP,teams_page),
-        ("Rewards",ft.icons.CARD_GIFT_CARD,rewards_page)
+        ("Dashboard",ft.icons.DASHBOARD,dashboard_view,mine(TaskChanged,WellnessLogged)),
+        ("Tasks",ft.icons.TASK,tasks_page,tasks_stale),
+        ("Goals",ft.icons.FLAG,lambda p,u,**k: tasks_page(p,u,type_='goal'),tasks_stale),
+        ("Wellness",ft.icons.HEALTH_AND_SAFETY,lambda p,u,**k: wellness_view(p,u),mine(WellnessLogged)),
+        ("Feedback",ft.icons.FEEDBACK,feedback_page,anyof(FeedbackSubmitted) if manager else never),
+        ("Training",ft.icons.SCHOOL,training_page,anyof(TrainingChanged)),
+        ("Teams",ft.icons.GROUP,teams_page,anyof(TeamChanged)),
+        ("Rewards",ft.icons.CARD_GIFT_CARD,rewards_page,anyof(PointsChanged,RewardsChanged,TeamChanged)),
+        ("Diagnostics",ft.icons.SPEED,diagnostics_page,None)
     ]
-    for idx,(label,icon,fn) in enumerate(PAGES):
+    for idx,(label,icon,fn,stale) in enumerate(PAGES):
         if label=="Teams" and role!='manager': continue
-        nav.items.append(ft.NavigationBarItem(icon=icon,label=label,on_click=lambda e,f=fn: select(f)))
-    def select(fn):
-        content.content=fn(page, user)
+        if label=="Diagnostics" and not (profiling.ENABLED and role=='manager'): continue
+        nav.items.append(ft.NavigationBarItem(icon=icon,label=label,on_click=lambda e,l=label: page.run_task(select,l)))
+    pages={label:(fn,stale) for label,icon,fn,stale in PAGES}
+    state={"build":None,"current":None,"views":{}}
+    async def select(label, rebuild=False):
+        state['current']=label
+        fn,stale=pages[label]
+        # a newer selection cancels the previous build and interrupts its in-flight queries
+        if state['build'] and not state['build'].done(): state['build'].cancel()
+        state['build']=None
+        if not rebuild and label in state['views']:
+            content.content=state['views'][label]; page.update(); return
+        build=state['build']=asyncio.ensure_future(fn(page, user))
+        with profiling.timed_page(label):
+            try: ctl=await build
+            except asyncio.CancelledError:
+                if build.cancelled(): return
+                raise
+        # finished just as another page was selected: that selection owns the content now
+        if state['build'] is not build: return
+        if stale is not None: state['views'][label]=ctl
+        content.content=ctl
         page.update()
+    async def changed(e):
+        nonlocal user
+        if isinstance(e,(TaskDueSoon,TaskOverdue)) and e.user_id==me:
+            t=await db.tasks.get_task(e.task_id)
+            if t:
+                text=f"Overdue: {t['title']}" if isinstance(e,TaskOverdue) else f"Due soon: {t['title']} ({t['due_date']})"
+                page.snack_bar=ft.SnackBar(ft.Text(text));page.snack_bar.open=True;page.update()
+            return
+        if isinstance(e,TeamChanged) and me in e.user_ids:
+            user=await db.read(get_user,token) or user
+        other=getattr(e,'user_id',None)!=me
+        for label in [l for l in state['views'] if pages[l][1](e)]:
+            view=state['views'][label]
+            if callable(view.data):
+                # pages with a form keep it and reload only their list
+                if other:
+                    await view.data()
+                    if label==state['current']: page.update()
+                continue
+            del state['views'][label]
+            # the page that made a change for this user has already updated itself in place;
+            # changes from other sessions rebuild the visible page live
+            if label==state['current'] and other:
+                await select(label, rebuild=True)
+    # events arrive on the publishing thread; hand them to this session's event loop
+    unsubscribe=events.subscribe(events.Event, lambda e: page.run_task(changed,e))
+    page.on_disconnect=lambda e: unsubscribe()
     nav.selected_index=0
-    select(PAGES[0][2])
+    await select(PAGES[0][0])
     page.add(content, nav)
     page.update()
 
-
-def main(page: ft.Page):
+async def main(page: ft.Page):
     page.title="Task & Wellness Management"
     page.vertical_alignment=ft.MainAxisAlignment.CENTER
     uname=ft.TextField(label="Username")
     pwd=ft.TextField(label="Password",password=True,can_reveal_password=True)
     role_dd=ft.Dropdown(label="Role",options=[ft.dropdown.Option("user"),ft.dropdown.Option("manager")])
     msg=ft.Text()
-    def on_login(e):
-        token=login(uname.value,pwd.value)
-        if token: page.clean();home_view(page,token)
+    # bcrypt runs on the auth worker pool; handlers await its futures without blocking the event loop
+    async def on_login(e):
+        msg.value="Signing in...";page.update()
+        try: token=await asyncio.wrap_future(login_async(uname.value,pwd.value))
+        except Exception: token=None
+        if token: page.clean();await home_view(page,token)
         else: msg.value="Invalid credentials";page.update()
-    def on_signup(e):
+    async def on_signup(e):
         try:
-            signup(uname.value,pwd.value,role_dd.value)
-            msg.value="Signup successful! Please login.";page.update()
+            await asyncio.wrap_future(signup_async(uname.value,pwd.value,role_dd.value))
+            msg.value="Signup successful! Please login."
         except Exception as ex:
-            msg.value=str(ex);page.update()
+            msg.value=str(ex)
+        page.update()
     page.add(uname,pwd,role_dd,ft.Row([ft.ElevatedButton("Login",on_click=on_login),ft.ElevatedButton("Signup",on_click=on_signup)]),msg)
 
 if __name__=='__main__':
+    import archive
+    from database import init_db
+    from scheduler import DueScheduler
+    init_db()
+    archive.Scheduler().start()
+    DueScheduler().start()
     ft.app(target=main,assets_dir="assets")
\ No newline at end of file
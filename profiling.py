@@ -0,0 +1,185 @@
+# Query and page-render profiling. Off by default; enable with APP_PROFILE=1 or enable().
+# When disabled, database.connection() hands out raw connections and nothing is recorded.
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+ENABLED = os.environ.get("APP_PROFILE") == "1"
+SLOW_QUERY_MS = float(os.environ.get("APP_SLOW_QUERY_MS", "100"))
+SAMPLE_SIZE = 2048           # latency samples kept per query/page for percentiles
+SKIP_FILES = ("database.py", "profiling.py")
+
+log = logging.getLogger("slow_query")
+_lock = threading.Lock()
+_queries = {}
+_pages = {}
+
+class _Stat:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+        self.sites = Counter()
+
+    def add(self, seconds, rows=0, site=None):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+        self.samples.append(seconds)
+        if site:
+            self.sites[site] += 1
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        pct = lambda p: 1000 * ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else 0.0
+        out = {"count": self.count, "total_ms": 1000 * self.total, "mean_ms": 1000 * self.total / self.count if self.count else 0.0,
+               "p50_ms": pct(0.50), "p95_ms": pct(0.95), "p99_ms": pct(0.99), "max_ms": 1000 * self.max}
+        if self.sites:
+            out["rows"] = self.rows
+            out["call_sites"] = dict(self.sites.most_common(5))
+        return out
+
+def enable(flag=True):
+    global ENABLED
+    ENABLED = flag
+
+def reset():
+    with _lock:
+        _queries.clear()
+        _pages.clear()
+
+def _call_site():
+    frame = sys._getframe(2)
+    while frame and os.path.basename(frame.f_code.co_filename) in SKIP_FILES:
+        frame = frame.f_back
+    if frame is None:
+        return "?"
+    return f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+
+def record_query(sql, seconds, rows, site):
+    sql = " ".join(sql.split())
+    with _lock:
+        _queries.setdefault(sql, _Stat()).add(seconds, rows, site)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        log.warning("slow query %.1f ms (%d rows) at %s: %s", seconds * 1000, rows, site, sql)
+
+@contextmanager
+def timed_page(label):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _pages.setdefault(label, _Stat()).add(time.perf_counter() - start)
+
+class ProfiledCursor:
+    """Cursor proxy that times a statement from execute through its last fetch."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._pending = None
+
+    def _start(self, sql, call):
+        self.finish()
+        site = _call_site()
+        start = time.perf_counter()
+        call()
+        self._pending = [sql, time.perf_counter() - start, 0, site]
+        return self
+
+    def execute(self, sql, params=()):
+        return self._start(sql, lambda: self._cursor.execute(sql, params))
+
+    def executemany(self, sql, seq):
+        return self._start(sql, lambda: self._cursor.executemany(sql, seq))
+
+    def _fetch(self, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        if self._pending:
+            self._pending[1] += time.perf_counter() - start
+            self._pending[2] += len(result) if isinstance(result, list) else result is not None
+        return result
+
+    def fetchone(self):
+        return self._fetch(self._cursor.fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(self._cursor.fetchmany, size or self._cursor.arraysize)
+
+    def fetchall(self):
+        return self._fetch(self._cursor.fetchall)
+
+    def __iter__(self):
+        while True:
+            row = self.fetchone()
+            if row is None:
+                return
+            yield row
+
+    def finish(self):
+        if self._pending:
+            sql, seconds, rows, site = self._pending
+            self._pending = None
+            record_query(sql, seconds, rows or max(self._cursor.rowcount, 0), site)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        # e.g. cur.row_factory = None must reach the real cursor, or the profiled path builds Rows
+        if name.startswith("_"):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._cursor, name, value)
+
+class ProfiledConnection:
+    """Connection proxy handed out while profiling; finish() records outstanding cursors."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._cursors = []
+
+    def cursor(self):
+        cur = ProfiledCursor(self._conn.cursor())
+        self._cursors.append(cur)
+        return cur
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return self.cursor().executemany(sql, seq)
+
+    def finish(self):
+        for cur in self._cursors:
+            cur.finish()
+        self._cursors.clear()
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def wrap(conn):
+    return ProfiledConnection(conn)
+
+def report(top=None):
+    with _lock:
+        queries = sorted(((sql, s.summary()) for sql, s in _queries.items()), key=lambda kv: -kv[1]["total_ms"])
+        pages = {label: s.summary() for label, s in _pages.items()}
+    return {"enabled": ENABLED, "slow_query_ms": SLOW_QUERY_MS,
+            "queries": [dict(sql=sql, **stat) for sql, stat in queries[:top]], "pages": pages}
+
+def dump(path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report(), f, indent=2)
@@ -1,34 +1,46 @@
 import sqlite3
-from database import get_conn
+from database import connection, write
+import events
+from leaderboard import LEADERBOARD
 
 def earn_points(user_id, pts):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("UPDATE points SET balance=balance+? WHERE user_id=?", (pts,user_id))
-    conn.commit(); conn.close()
+    def earn(conn):
+        entry = conn.execute("INSERT INTO points_ledger(user_id,delta,reason) VALUES(?,?,'earn')", (user_id,pts)).lastrowid
+        return conn.execute("SELECT balance FROM points WHERE user_id=?", (user_id,)).fetchone()[0], entry
+    events.publish(events.PointsChanged(user_id, *write(earn)))
 
 def get_balance(user_id):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT balance FROM points WHERE user_id=?", (user_id,))
-    bal = c.fetchone()[0]; conn.close()
-    return bal
+    with connection() as conn:
+        return conn.execute("SELECT balance FROM points WHERE user_id=?", (user_id,)).fetchone()[0]
 
 def redeem_reward(user_id, reward_id):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT cost FROM rewards WHERE id=?", (reward_id,))
-    cost = c.fetchone()[0]
-    bal = get_balance(user_id)
-    if bal >= cost:
-        c.execute("UPDATE points SET balance=balance-? WHERE user_id=?", (cost,user_id))
-        conn.commit()
-    conn.close()
+    # One conditional statement: the debit is recorded only if the balance covers the cost,
+    # and the ledger trigger updates points.balance in the same transaction.
+    def redeem(conn):
+        cur = conn.execute("""
+            INSERT INTO points_ledger(user_id,delta,reason,reward_id)
+            SELECT ?, -cost, 'redeem', id FROM rewards
+            WHERE id=? AND cost <= (SELECT balance FROM points WHERE user_id=?)""", (user_id,reward_id,user_id))
+        if cur.rowcount != 1:
+            return None
+        return conn.execute("SELECT balance FROM points WHERE user_id=?", (user_id,)).fetchone()[0], cur.lastrowid
+    result = write(redeem)
+    if result is None:
+        return False
+    events.publish(events.PointsChanged(user_id, *result))
+    return True
+
+def get_ledger(user_id, limit=50):
+    with connection() as conn:
+        return conn.execute("SELECT * FROM points_ledger WHERE user_id=? ORDER BY created_at DESC, id DESC LIMIT ?", (user_id,limit)).fetchall()
+
+def get_leaderboard(k=10, team_id=None):
+    return LEADERBOARD.top(k, team_id)
 
 def list_rewards():
-    conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT * FROM rewards")
-    r = c.fetchall(); conn.close()
-    return r
+    with connection() as conn:
+        return conn.execute("SELECT * FROM rewards").fetchall()
 
 def add_reward(name, cost, created_by):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("INSERT INTO rewards(name,cost,created_by) VALUES(?,?,?)", (name,cost,created_by))
-    conn.commit(); conn.close()
\ No newline at end of file
+    write(lambda conn: conn.execute("INSERT INTO rewards(name,cost,created_by) VALUES(?,?,?)", (name,cost,created_by)))
+    events.publish(events.RewardsChanged(created_by))
@@ -0,0 +1,170 @@
+# Due-date scheduler: open tasks and goals due soon are kept in a min-heap keyed by the time
+# their reminder or overdue event should fire. The heap is filled from the partial due_ts index
+# a slice at a time (never the whole table) and kept current from TaskChanged events.
+# The clock is injectable; run_pending() fires everything due at clock() and can be driven
+# directly, or start() loads and runs it on a background thread.
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+import events
+from database import connection
+
+REMIND_BEFORE = 24 * 3600     # reminder lead time, seconds before due
+LOOKAHEAD = 7 * 24 * 3600     # how far ahead of the clock tasks are loaded into the heap
+CATCH_UP = 0                  # seconds before start() whose overdue tasks still fire
+
+log = logging.getLogger("scheduler")
+
+REMINDER, OVERDUE = 0, 1
+
+class DueScheduler:
+    def __init__(self, clock=time.time, remind_before=REMIND_BEFORE, lookahead=LOOKAHEAD):
+        self.clock = clock
+        self.remind_before = remind_before
+        self.lookahead = lookahead
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._heap = []        # (fire_at, kind, generation, task_id, due_ts, user_id)
+        self._live = {}        # task_id -> generation of its current heap entries
+        self._generation = itertools.count()
+        self._loaded_until = None
+        self._loading = threading.Lock()   # one slice load at a time
+        self._target = None    # end of the slice being loaded
+        self._touched = set()  # tasks changed while it loads; their event handler read them later
+        self._unsubscribe = None
+        self._thread = None
+        self._stopping = False
+
+    def __len__(self):
+        return len(self._live)
+
+    def load(self, since=None):
+        """Track open tasks due from since (default: now - CATCH_UP) up to the lookahead."""
+        now = self.clock()
+        since = now - CATCH_UP if since is None else since
+        with self._lock:
+            self._heap.clear(); self._live.clear()
+            self._loaded_until = since
+        # subscribe first, so a task created while the first slice loads isn't missed
+        if self._unsubscribe is None:
+            self._unsubscribe = events.subscribe(events.TaskChanged, self._on_task_changed)
+        self._extend(now + self.lookahead)
+        return self
+
+    def _extend(self, until):
+        # load the next due_ts slice; an index range scan, one row per open task in it
+        with self._loading:
+            with self._lock:
+                start = self._loaded_until
+                if until <= start:
+                    return
+                self._target = until
+                self._touched.clear()
+            try:
+                with connection() as conn:
+                    rows = conn.execute(
+                        "SELECT id, assigned_to, due_ts FROM tasks WHERE completed = 0 AND due_ts >= ? AND due_ts < ?",
+                        (int(start), int(until))).fetchall()
+                with self._lock:
+                    # a task changed since the read was re-tracked (or dropped) from a fresher row
+                    for r in rows:
+                        if r[0] not in self._touched:
+                            self._heap.extend(self._entries(r[0], r[2], r[1]))
+                    heapq.heapify(self._heap)
+                    self._loaded_until = until
+                    self._wake.notify()
+            finally:
+                with self._lock:
+                    self._target = None
+                    self._touched.clear()
+
+    def _entries(self, task_id, due_ts, user_id):
+        # caller holds the lock; re-tracking a task orphans its older entries
+        gen = self._live[task_id] = next(self._generation)
+        return ((due_ts - self.remind_before, REMINDER, gen, task_id, due_ts, user_id),
+                (due_ts, OVERDUE, gen, task_id, due_ts, user_id))
+
+    def _on_task_changed(self, e):
+        with connection() as conn:
+            row = conn.execute("SELECT assigned_to, completed, due_ts FROM tasks WHERE id=?", (e.task_id,)).fetchone()
+        with self._lock:
+            self._live.pop(e.task_id, None)  # its old heap entries are skipped when they surface
+            if self._target is not None:
+                self._touched.add(e.task_id)
+            horizon = self._target or self._loaded_until
+            if row and not row['completed'] and row['due_ts'] is not None and row['due_ts'] < horizon:
+                for entry in self._entries(e.task_id, row['due_ts'], row['assigned_to']):
+                    heapq.heappush(self._heap, entry)
+                self._wake.notify()
+
+    def next_fire(self):
+        with self._lock:
+            self._prune()
+            return self._heap[0][0] if self._heap else None
+
+    def _prune(self):
+        while self._heap and self._live.get(self._heap[0][3]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+
+    def run_pending(self):
+        """Publish every reminder/overdue event due at clock(); returns the events fired."""
+        now = self.clock()
+        if now + self.lookahead / 2 > self._loaded_until:
+            self._extend(now + self.lookahead)
+        fired = []
+        with self._lock:
+            while True:
+                self._prune()
+                if not self._heap or self._heap[0][0] > now:
+                    break
+                _, kind, _, task_id, due_ts, user_id = heapq.heappop(self._heap)
+                if kind == OVERDUE:
+                    del self._live[task_id]
+                    fired.append(events.TaskOverdue(user_id, task_id, due_ts))
+                elif due_ts > now:
+                    fired.append(events.TaskDueSoon(user_id, task_id, due_ts))
+        for event in fired:
+            events.publish(event)
+        return fired
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if self._stopping:
+                    return
+                self._prune()
+                delay = self._heap[0][0] - self.clock() if self._heap else self.lookahead / 2
+                # wake at least every half lookahead to load the next slice
+                self._wake.wait(max(0, min(delay, self.lookahead / 2)))
+                if self._stopping:
+                    return
+            try:
+                self.run_pending()
+            except Exception:
+                log.exception("due-date scheduler run failed")
+
+    def _start(self):
+        # the first slice is read here rather than on the thread calling start()
+        if self._loaded_until is None:
+            try:
+                self.load()
+            except Exception:
+                log.exception("due-date scheduler load failed")
+        self._run()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._start, name="due-scheduler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._stopping = True
+            self._wake.notify()
+        if self._thread:
+            self._thread.join()
+        if self._unsubscribe:
+            self._unsubscribe(); self._unsubscribe = None
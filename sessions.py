@@ -0,0 +1,82 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+import events
+
+SESSION_TTL = 8 * 3600      # idle seconds before a session expires
+MAX_SESSIONS = 10000
+TOKEN_BYTES = 32
+
+def new_token() -> str:
+    return secrets.token_urlsafe(TOKEN_BYTES)
+
+class SessionStore:
+    """Bounded LRU of token -> [user_id, cached user row, expiry], with sliding TTL."""
+
+    def __init__(self, ttl=SESSION_TTL, max_entries=MAX_SESSIONS, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._by_user = {}
+        self._lock = threading.Lock()
+
+    def create(self, user_id, row=None) -> str:
+        token = new_token()
+        with self._lock:
+            self._entries[token] = [user_id, row, self.clock() + self.ttl]
+            self._by_user.setdefault(user_id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+        return token
+
+    def get(self, token):
+        """Return (user_id, cached row or None) for a live token, else None."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            now = self.clock()
+            if entry[2] <= now:
+                self._drop(token)
+                return None
+            entry[2] = now + self.ttl
+            self._entries.move_to_end(token)
+            return entry[0], entry[1]
+
+    def cache_row(self, token, row):
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                entry[1] = row
+
+    def invalidate_user(self, user_id):
+        # Forget the cached row but keep the session; it is reloaded on next access
+        with self._lock:
+            for token in self._by_user.get(user_id, ()):
+                self._entries[token][1] = None
+
+    def revoke(self, token):
+        with self._lock:
+            if token in self._entries:
+                self._drop(token)
+
+    def _drop(self, token):
+        uid = self._entries.pop(token)[0]
+        tokens = self._by_user.get(uid)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[uid]
+
+    def __len__(self):
+        return len(self._entries)
+
+SESSIONS = SessionStore()
+
+def invalidate_user(user_id):
+    SESSIONS.invalidate_user(user_id)
+
+# cached user rows carry team_id, so team moves must reload them
+events.subscribe(events.TeamChanged, lambda e: [invalidate_user(uid) for uid in e.user_ids])
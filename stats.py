@@ -0,0 +1,53 @@
+# Per-user dashboard summary, kept current by the user_stats triggers.
+# Usage: python stats.py [--rebuild]   (checks consistency; --rebuild also repairs)
+import sys
+import archive
+from database import USER_STATS_SOURCE, connection, init_db
+
+STATS_COLUMNS = ("user_id", "tasks_total", "tasks_completed", "wellness_count",
+                 "stress_count", "stress_sum", "latest_stress", "latest_stress_at")
+
+def get_user_stats(user_id):
+    with connection() as conn:
+        row = conn.execute("""
+            SELECT tasks_total, tasks_completed, tasks_total - tasks_completed AS tasks_pending,
+                   CASE WHEN tasks_total THEN 1.0 * tasks_completed / tasks_total END AS completion_ratio,
+                   wellness_count, latest_stress, latest_stress_at,
+                   CASE WHEN stress_count THEN 1.0 * stress_sum / stress_count END AS avg_stress
+            FROM user_stats WHERE user_id=?""", (user_id,)).fetchone()
+    if row:
+        return dict(row)
+    return {"tasks_total": 0, "tasks_completed": 0, "tasks_pending": 0, "completion_ratio": None,
+            "wellness_count": 0, "latest_stress": None, "latest_stress_at": None, "avg_stress": None}
+
+def _source(conn):
+    # archived rows still count towards the summary
+    return archive.with_archive(conn, USER_STATS_SOURCE, None, "tasks", "wellness")
+
+def check_user_stats():
+    """Rebuild the summary from scratch and return {user_id: (stored, expected)} for mismatches."""
+    with connection() as conn:
+        expected = {r[0]: tuple(r) for r in conn.execute(_source(conn))}
+        stored = {r[0]: tuple(r) for r in conn.execute(f"SELECT {','.join(STATS_COLUMNS)} FROM user_stats")}
+    empty = lambda uid: (uid, 0, 0, 0, 0, 0, None, None)
+    return {uid: (stored.get(uid, empty(uid)), expected.get(uid, empty(uid)))
+            for uid in expected.keys() | stored.keys()
+            if stored.get(uid, empty(uid)) != expected.get(uid, empty(uid))}
+
+def rebuild_user_stats():
+    with connection() as conn:
+        conn.execute("DELETE FROM user_stats")
+        conn.execute("INSERT INTO user_stats SELECT * FROM (" + _source(conn) + ") WHERE true")
+
+if __name__ == "__main__":
+    init_db()
+    mismatches = check_user_stats()
+    for uid, (stored, expected) in sorted(mismatches.items()):
+        print(f"user {uid}: stored {stored} != expected {expected}")
+    if mismatches and "--rebuild" in sys.argv:
+        rebuild_user_stats()
+        mismatches = check_user_stats()
+        print("rebuilt user_stats" if not mismatches else "user_stats still inconsistent after rebuild")
+    elif not mismatches:
+        print("user_stats is consistent")
+    sys.exit(1 if mismatches else 0)
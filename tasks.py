@@ -1,23 +1,52 @@
 import sqlite3
-from database import get_conn
+from database import connection, write
+import archive
+import events
 from datetime import datetime
 
 def create_task(title, desc, assigned_to, due_date, type_='task'):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("INSERT INTO tasks(title,description,assigned_to,type,due_date) VALUES(?,?,?,?,?)", (title,desc,assigned_to,type_,due_date))
-    conn.commit(); conn.close()
+    # UI dropdowns hand over ids as strings; events and caches are keyed by int
+    assigned_to = None if assigned_to is None else int(assigned_to)
+    task_id = write(lambda conn: conn.execute("INSERT INTO tasks(title,description,assigned_to,type,due_date) VALUES(?,?,?,?,?)", (title,desc,assigned_to,type_,due_date))).lastrowid
+    events.publish(events.TaskChanged(assigned_to, task_id))
+    return task_id
 
-def get_tasks(user_id, include_completed=True):
-    conn = get_conn(); c = conn.cursor()
+def get_tasks(user_id, include_completed=True, type_=None, completed=None,
+              due_after=None, due_before=None, after_id=None, limit=None):
+    # Keyset pagination: pass the last id of the previous page as after_id.
+    # Archived (completed, long past due) tasks are included only for due-date ranges reaching them.
     q = "SELECT * FROM tasks WHERE assigned_to=?"
     params = [user_id]
     if not include_completed:
-        q += " AND completed=0"
-    c.execute(q, params)
-    tasks = c.fetchall(); conn.close()
-    return tasks
+        completed = False
+    if completed is not None:
+        q += " AND completed=?"
+        params.append(int(completed))
+    if type_:
+        q += " AND type=?"
+        params.append(type_)
+    if due_after:
+        q += " AND due_date>=?"
+        params.append(due_after)
+    if due_before:
+        q += " AND due_date<?"
+        params.append(due_before)
+    if after_id is not None:
+        q += " AND id>?"
+        params.append(after_id)
+    q += " ORDER BY id"
+    if limit:
+        q += " LIMIT ?"
+        params.append(limit)
+    with connection() as conn:
+        if (due_after or due_before) and completed is not False:
+            q = archive.with_archive(conn, q, due_after, "tasks")
+        return conn.execute(q, params).fetchall()
+
+def get_task(task_id):
+    with connection() as conn:
+        return conn.execute("SELECT * FROM tasks WHERE id=?", (task_id,)).fetchone()
 
 def toggle_complete(task_id, user_id):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("UPDATE tasks SET completed=1-completed WHERE id=? AND assigned_to=?", (task_id,user_id))
-    conn.commit(); conn.close()
\ No newline at end of file
+    write(lambda conn: conn.execute("UPDATE tasks SET completed=1-completed WHERE id=? AND assigned_to=?", (task_id,user_id)))
+    events.publish(events.TaskChanged(user_id, task_id))
@@ -1,35 +1,124 @@
+import json
 import sqlite3
-from database import get_conn
-
-def create_team(name, manager_id, member_ids):
-    conn = get_conn(); c = conn.cursor()
-    # insert team
-    c.execute("INSERT INTO teams(name) VALUES(?)", (name,))
-    team_id = c.lastrowid
-    # assign manager and members
-    for uid in [manager_id] + member_ids:
-        c.execute("UPDATE users SET team_id=? WHERE id=?", (team_id, uid))
-    conn.commit(); conn.close()
+import threading
+from database import connection, write
+import events
+
+# Membership changes are one set-based statement per direction, in one transaction. The
+# per-team employee cap (teams.max_members) is enforced by triggers, so an add that would
+# overfill a team fails as a whole with sqlite3.IntegrityError('team is full').
+DEFAULT_MAX_MEMBERS = 5
+
+def _ids(user_ids):
+    # UI checkbox keys arrive as strings; events and caches are keyed by int
+    return tuple(int(u) for u in user_ids)
+
+def _assign(conn, team_id, user_ids):
+    conn.execute("UPDATE users SET team_id=? WHERE id IN (SELECT value FROM json_each(?))",
+                 (team_id, json.dumps(user_ids)))
+
+def create_team(name, manager_id, member_ids, max_members=DEFAULT_MAX_MEMBERS):
+    user_ids = _ids([manager_id, *member_ids])
+    def create(conn):
+        team_id = conn.execute("INSERT INTO teams(name,max_members) VALUES(?,?)", (name, max_members)).lastrowid
+        _assign(conn, team_id, user_ids)
+        return team_id
+    team_id = write(create)
+    events.publish(events.TeamChanged(team_id, user_ids))
     return team_id
 
-def edit_team(team_id, new_name=None, add_ids=[], remove_ids=[]):
-    conn = get_conn(); c = conn.cursor()
-    if new_name:
-        c.execute("UPDATE teams SET name=? WHERE id=?", (new_name, team_id))
-    for uid in add_ids:
-        c.execute("UPDATE users SET team_id=? WHERE id=?", (team_id, uid))
-    for uid in remove_ids:
-        c.execute("UPDATE users SET team_id=NULL WHERE id=? AND team_id=?", (uid, team_id))
-    conn.commit(); conn.close()
+def edit_team(team_id, new_name=None, add_ids=(), remove_ids=(), max_members=None):
+    add_ids, remove_ids = _ids(add_ids), _ids(remove_ids)
+    def edit(conn):
+        if new_name:
+            conn.execute("UPDATE teams SET name=? WHERE id=?", (new_name, team_id))
+        if max_members is not None:
+            conn.execute("UPDATE teams SET max_members=? WHERE id=?", (max_members, team_id))
+        # removals first, so a swap within a full team fits
+        if remove_ids:
+            conn.execute("UPDATE users SET team_id=NULL WHERE team_id=? AND id IN (SELECT value FROM json_each(?))",
+                         (team_id, json.dumps(remove_ids)))
+        if add_ids:
+            _assign(conn, team_id, add_ids)
+    write(edit)
+    events.publish(events.TeamChanged(team_id, add_ids + remove_ids))
+
+def delete_team(team_id):
+    def delete(conn):
+        members = [r[0] for r in conn.execute("SELECT id FROM users WHERE team_id=?", (team_id,))]
+        conn.execute("UPDATE users SET team_id=NULL WHERE team_id=?", (team_id,))
+        conn.execute("DELETE FROM teams WHERE id=?", (team_id,))
+        return members
+    events.publish(events.TeamChanged(team_id, tuple(write(delete))))
+
+class RosterCache:
+    """Team rosters and the pool of unassigned employees, kept until a membership event.
+
+    Loads record the version they started at and are not stored if an event arrived
+    meanwhile, so a slow read never re-caches a roster that has just changed.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = 0
+        self._teams = {}        # team_id -> tuple of (id, username) rows
+        self._available = None
+
+    def _load(self, sql, params):
+        with self._lock:
+            version = self._version
+        # under a reporting snapshot this is the first read, so the snapshot starts after the version is taken
+        with connection() as conn:
+            rows = tuple(conn.execute(sql, params).fetchall())
+        return version, rows
+
+    def members(self, team_id):
+        with self._lock:
+            hit = self._teams.get(team_id)
+        if hit is None:
+            version, hit = self._load("SELECT id,username FROM users WHERE team_id=?", (team_id,))
+            with self._lock:
+                if version == self._version:
+                    self._teams[team_id] = hit
+        return list(hit)
+
+    def available(self):
+        with self._lock:
+            hit = self._available
+        if hit is None:
+            version, hit = self._load("SELECT id,username FROM users WHERE role='user' AND (team_id IS NULL)", ())
+            with self._lock:
+                if version == self._version:
+                    self._available = hit
+        return list(hit)
+
+    def on_team_changed(self, e):
+        moved = set(e.user_ids)
+        with self._lock:
+            self._version += 1
+            self._available = None
+            self._teams.pop(e.team_id, None)
+            # users added here may have left another cached team
+            for tid in [t for t, rows in self._teams.items() if moved.intersection(r[0] for r in rows)]:
+                del self._teams[tid]
+
+    def on_user_created(self, e):
+        with self._lock:
+            self._version += 1
+            self._available = None
+
+    def reset(self):
+        with self._lock:
+            self._version += 1
+            self._teams.clear()
+            self._available = None
+
+ROSTERS = RosterCache()
+events.subscribe(events.TeamChanged, ROSTERS.on_team_changed)
+events.subscribe(events.UserCreated, ROSTERS.on_user_created)
 
 def get_team_members(team_id):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT id,username FROM users WHERE team_id=?", (team_id,))
-    members = c.fetchall(); conn.close()
-    return members
+    return ROSTERS.members(team_id)
 
 def get_available_employees():
-    conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT id,username FROM users WHERE role='user' AND (team_id IS NULL)")
-    avail = c.fetchall(); conn.close()
-    return avail
\ No newline at end of file
+    return ROSTERS.available()
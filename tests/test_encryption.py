@@ -0,0 +1,86 @@
+# Encrypted feedback: key rotation by a second process while this one keeps reading and
+# writing, and a search index that holds no plaintext.
+# Usage: python -m pytest tests
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+from cryptography.fernet import Fernet
+
+import database
+import encryption
+import feedback
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "app.db"))
+    monkeypatch.setattr(encryption, "KEY_PATH", str(tmp_path / "secret.key"))
+    monkeypatch.setattr(encryption, "SEARCH_KEY_PATH", str(tmp_path / "search.key"))
+    monkeypatch.setattr(encryption, "_fernet", None)
+    monkeypatch.setattr(encryption, "_search_key", None)
+    database.init_db()
+    yield database.DB_PATH
+    database.shutdown()
+
+def rotate_elsewhere(*flags):
+    code = (f"import database, encryption; database.DB_PATH = {database.DB_PATH!r}; "
+            f"encryption.KEY_PATH = {encryption.KEY_PATH!r}; encryption.main(['rotate', *{list(flags)!r}])")
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True, capture_output=True)
+
+def messages():
+    return [r['message'] for r in feedback.with_messages(feedback.get_feedback())]
+
+def test_rotation_from_another_process(db):
+    feedback.submit_feedback(None, "before rotation")
+    assert messages() == ["before rotation"]
+
+    rotate_elsewhere()
+    assert messages() == ["before rotation"]
+    feedback.submit_feedback(None, "after rotation")
+    # new values use the key the other process put first in the ring
+    newest = Fernet(encryption.load_keys()[0])
+    with database.connection() as conn:
+        tokens = [r[0] for r in conn.execute("SELECT message FROM feedback ORDER BY id")]  # full-scan
+    assert [newest.decrypt(t).decode() for t in tokens] == ["before rotation", "after rotation"]
+
+    rotate_elsewhere("--retire")
+    encryption._decrypt_cached.cache_clear()
+    assert sorted(messages()) == ["after rotation", "before rotation"]
+    assert len(encryption.load_keys()) == 1
+
+def test_search_index_holds_no_plaintext(db):
+    feedback.submit_feedback(2, "Zebrafish onboarding feedback")
+    feedback.submit_feedback(2, "sprint planning")
+    assert [r['message'] for r in feedback.with_messages(feedback.search_feedback("zebra onb"))] == \
+        ["Zebrafish onboarding feedback"]
+    assert feedback.search_feedback("zebrafishes") == []
+    database.shutdown()
+    conn = sqlite3.connect(db)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    data = open(db, "rb").read().lower()
+    assert not any(w in data for w in (b"zebra", b"onboarding", b"sprint", b"planning"))
+
+def test_migration_replaces_plaintext_index(db):
+    database.shutdown()
+    os.remove(db)
+    conn = sqlite3.connect(db)
+    migrations = database.MIGRATIONS
+    database.MIGRATIONS = migrations[:14]
+    try:
+        database.migrate(conn)
+    finally:
+        database.MIGRATIONS = migrations
+    # a database from before the index was blinded
+    conn.execute("INSERT INTO feedback(message) VALUES(?)", (encryption.encrypt_field("legacy zebrafish"),))
+    conn.execute("INSERT INTO feedback_fts(rowid, message) VALUES(1, 'legacy zebrafish')")
+    conn.commit()
+    database.migrate(conn)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    assert b"zebrafish" not in open(db, "rb").read()
+    assert [r['id'] for r in feedback.search_feedback("zebra")] == [1]
@@ -0,0 +1,89 @@
+# Due-date scheduler driven by a fake clock: reminders, overdue events, completions, and
+# tasks that change while the next due_ts slice is being read.
+# Usage: python -m pytest tests
+import contextlib
+import time
+
+import pytest
+
+import database
+import events
+import scheduler
+import tasks
+
+T0 = 1_900_000_000
+HOUR, DAY = 3600, 86400
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "app.db"))
+    database.init_db()
+    yield database.DB_PATH
+    database.shutdown()
+
+@pytest.fixture
+def clock():
+    return [T0]
+
+@pytest.fixture
+def due(db, clock):
+    s = scheduler.DueScheduler(clock=lambda: clock[0], remind_before=HOUR, lookahead=DAY)
+    yield s
+    s.stop()
+
+def add_task(user_id, due_ts):
+    return tasks.create_task("t", "", user_id, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(due_ts)))
+
+def test_reminder_then_overdue(due, clock):
+    task = add_task(1, T0 + 6 * HOUR)
+    due.load()
+    assert due.run_pending() == []
+    clock[0] = T0 + 5 * HOUR + 1
+    assert due.run_pending() == [events.TaskDueSoon(1, task, T0 + 6 * HOUR)]
+    clock[0] = T0 + 6 * HOUR
+    assert due.run_pending() == [events.TaskOverdue(1, task, T0 + 6 * HOUR)]
+    assert due.run_pending() == [] and len(due) == 0
+
+def test_completed_task_does_not_fire(due, clock):
+    task = add_task(1, T0 + 6 * HOUR)
+    due.load()
+    tasks.toggle_complete(task, 1)
+    clock[0] = T0 + 7 * HOUR
+    assert due.run_pending() == []
+    tasks.toggle_complete(task, 1)
+    assert due.run_pending() == [events.TaskOverdue(1, task, T0 + 6 * HOUR)]
+
+def test_changes_while_a_slice_loads(due, clock, monkeypatch):
+    done = add_task(1, T0 + 30 * HOUR)
+    due.load()
+    late = []
+    def race():
+        # after the next slice was read: one task in it is completed, another created
+        tasks.toggle_complete(done, 1)
+        late.append(add_task(2, T0 + 28 * HOUR))
+    hooks = [race]
+    @contextlib.contextmanager
+    def racing_connection():
+        with database.connection() as conn:
+            yield conn
+        if hooks:
+            hooks.pop()()
+    monkeypatch.setattr(scheduler, "connection", racing_connection)
+    clock[0] = T0 + 13 * HOUR
+    assert due.run_pending() == []
+    assert not hooks
+    clock[0] = T0 + 2 * DAY
+    assert due.run_pending() == [events.TaskOverdue(2, late[0], T0 + 28 * HOUR)]
+
+def test_start_loads_on_its_own_thread(due, clock, monkeypatch):
+    caller = scheduler.threading.current_thread()
+    loaded = []
+    load = due.load
+    monkeypatch.setattr(due, "load", lambda: loaded.append(scheduler.threading.current_thread()) or load())
+    due.start()
+    for _ in range(200):
+        if due._loaded_until == T0 + DAY:
+            break
+        time.sleep(0.01)
+    assert loaded and loaded[0] is not caller
+    assert due._loaded_until == T0 + DAY
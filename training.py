@@ -1,13 +1,26 @@
 import sqlite3
-from database import get_conn
+import events
+from database import connection, fts_query, write
 
 def add_resource(title, url, added_by):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("INSERT INTO training(title,url,added_by) VALUES(?,?,?)", (title,url,added_by))
-    conn.commit(); conn.close()
+    write(lambda conn: conn.execute("INSERT INTO training(title,url,added_by) VALUES(?,?,?)", (title,url,added_by)))
+    events.publish(events.TrainingChanged(added_by))
 
-def list_resources():
-    conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT * FROM training")
-    res = c.fetchall(); conn.close()
-    return res
\ No newline at end of file
+def list_resources(limit=None, offset=0):
+    q = "SELECT * FROM training ORDER BY id"
+    params = []
+    if limit:
+        q += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    with connection() as conn:
+        return conn.execute(q, params).fetchall()
+
+def search_resources(text, limit=20, offset=0):
+    match = fts_query(text)
+    if not match:
+        return list_resources(limit, offset)
+    with connection() as conn:
+        return conn.execute("""
+            SELECT t.* FROM training_fts
+            JOIN training t ON t.id = training_fts.rowid
+            WHERE training_fts MATCH ? ORDER BY training_fts.rank LIMIT ? OFFSET ?""", (match, limit, offset)).fetchall()
@@ -1,14 +1,39 @@
+import json
 import sqlite3
-from database import get_conn
+from database import connection, write
+import archive
+import encryption
+import events
 from datetime import datetime
 
 def log_wellness(user_id, stress, workload, notes):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("INSERT INTO wellness(user_id,stress_level,workload,notes) VALUES(?,?,?,?)", (user_id,stress,workload,notes))
-    conn.commit(); conn.close()
+    notes = encryption.encrypt_field(notes or None)
+    write(lambda conn: conn.execute("INSERT INTO wellness(user_id,stress_level,workload,notes) VALUES(?,?,?,?)", (user_id,stress,workload,notes)))
+    events.publish(events.WellnessLogged(user_id))
 
-def get_wellness(user_id):
-    conn = get_conn(); c = conn.cursor()
-    c.execute("SELECT * FROM wellness WHERE user_id=? ORDER BY timestamp", (user_id,))
-    data = c.fetchall(); conn.close()
-    return data
+def get_wellness(user_id, since=None, until=None):
+    # Entries older than the retention window are archived; a range reaching back that far
+    # (or no since at all) reads both tiers.
+    # Notes are encrypted and left out; get_notes decrypts the ones being shown
+    q = "SELECT id,user_id,timestamp,stress_level,workload FROM wellness WHERE user_id=?"
+    params = [user_id]
+    if since:
+        q += " AND timestamp>=?"
+        params.append(since)
+    if until:
+        q += " AND timestamp<?"
+        params.append(until)
+    q += " ORDER BY timestamp"
+    with connection() as conn:
+        q = archive.with_archive(conn, q, since, "wellness")
+        return conn.execute(q, params).fetchall()
+
+def get_notes(entry_ids):
+    """Decrypted notes as {entry id: notes}, from either tier."""
+    with connection() as conn:
+        rows = conn.execute("""
+            SELECT id, notes FROM wellness WHERE id IN (SELECT value FROM json_each(:ids))
+            UNION ALL
+            SELECT id, notes FROM wellness_archive WHERE id IN (SELECT value FROM json_each(:ids))""",
+                            {"ids": json.dumps(list(entry_ids))}).fetchall()
+    return dict(zip((r[0] for r in rows), encryption.decrypt_many(r[1] for r in rows)))
@@ -0,0 +1,127 @@
+# Organisation-wide wellness analytics: stress entries are loaded column-wise into NumPy
+# arrays and every user's rolling averages, trend, volatility and burnout risk come out
+# of one grouped pass (bincount over user ids), so cost grows linearly with entries.
+# Usage: python wellness_analytics.py [--as-of YYYY-MM-DD] [--window DAYS]
+import datetime
+import sys
+from itertools import chain
+
+import numpy as np
+
+import archive
+from database import connection, init_db, reporting, write
+
+WINDOW_DAYS = 90
+RISK_THRESHOLD = 70.0
+# burnout risk (0-100) weights: recent stress level, rising trend, day-to-day volatility
+W_LEVEL, W_TREND, W_VOL = 0.5, 0.3, 0.2
+TREND_MAX = 2.0      # stress points per week that count as a maximal upward trend
+VOL_MAX = 3.0        # standard deviation of stress (1-10 scale) that counts as maximal volatility
+
+LOAD_SQL = """
+    SELECT user_id, julianday(timestamp) - julianday(:since), stress_level FROM wellness
+    WHERE timestamp >= :since AND timestamp < :until AND stress_level IS NOT NULL AND user_id IS NOT NULL"""
+
+def load(conn, since, until):
+    """(user_ids, days since `since`, stress) arrays for entries in [since, until)."""
+    cur = conn.cursor()
+    cur.row_factory = None
+    cur.execute(archive.with_archive(conn, LOAD_SQL, since, "wellness"), {"since": since, "until": until})
+    flat = np.fromiter(chain.from_iterable(cur), dtype=np.float64)
+    cols = flat.reshape(-1, 3)
+    return cols[:, 0].astype(np.int64), cols[:, 1], cols[:, 2]
+
+def _mean(total, count):
+    return np.divide(total, count, out=np.full(len(total), np.nan), where=count > 0)
+
+def compute(user_ids, days, stress, window=WINDOW_DAYS):
+    """Per-user metrics for entries at days in [0, window); returns (user ids, {metric: array})."""
+    size = int(user_ids.max()) + 1 if len(user_ids) else 0
+    group = lambda weights=None, mask=slice(None): np.bincount(
+        user_ids[mask], weights=None if weights is None else weights[mask], minlength=size)
+    n = group()
+    sy, syy = group(stress), group(stress * stress)
+    sx, sxx, sxy = group(days), group(days * days), group(days * stress)
+    users = np.flatnonzero(n)
+    n, sy, syy, sx, sxx, sxy = (a[users] for a in (n, sy, syy, sx, sxx, sxy))
+    mean = sy / n
+    volatility = np.sqrt(np.maximum(syy / n - mean * mean, 0))
+    # least-squares slope of stress over time, in points per day
+    slope = _mean(n * sxy - sx * sy, n * sxx - sx * sx)
+    recent = {span: days >= window - span for span in (7, 28)}
+    avg_7d = _mean(group(stress, recent[7])[users], group(mask=recent[7])[users])
+    avg_28d = _mean(group(stress, recent[28])[users], group(mask=recent[28])[users])
+    level = np.where(np.isnan(avg_7d), mean, avg_7d)
+    risk = 100 * np.clip(W_LEVEL * (level - 1) / 9
+                         + W_TREND * np.clip(np.nan_to_num(slope) * 7 / TREND_MAX, 0, 1)
+                         + W_VOL * np.clip(volatility / VOL_MAX, 0, 1), 0, 1)
+    return users, {"entries": n.astype(np.int64), "avg_7d": avg_7d, "avg_28d": avg_28d,
+                   "slope": slope, "volatility": volatility, "risk": risk}
+
+def team_rollup(users, risk, team_of):
+    """Per-team (team ids, members, avg risk, max risk, members at risk) for users with a team."""
+    teams = team_of[users]
+    mask = teams >= 0
+    teams, risk = teams[mask], risk[mask]
+    size = int(teams.max()) + 1 if len(teams) else 0
+    members = np.bincount(teams, minlength=size)
+    ids = np.flatnonzero(members)
+    highest = np.zeros(size)
+    np.maximum.at(highest, teams, risk)
+    at_risk = np.bincount(teams, weights=risk >= RISK_THRESHOLD, minlength=size)
+    total = np.bincount(teams, weights=risk, minlength=size)
+    return ids, members[ids], total[ids] / members[ids], highest[ids], at_risk[ids].astype(np.int64)
+
+def _nullable(values):
+    return [None if v != v else v for v in values.tolist()]
+
+def _store(conn, user_rows, team_rows):
+    conn.execute("DELETE FROM burnout_scores")
+    conn.execute("DELETE FROM team_burnout_scores")
+    conn.executemany("INSERT INTO burnout_scores VALUES (?,?,?,?,?,?,?,?,?)", user_rows)
+    conn.executemany("INSERT INTO team_burnout_scores VALUES (?,?,?,?,?,?)", team_rows)
+
+def refresh_scores(as_of=None, window=WINDOW_DAYS):
+    """Score every user with entries in the window ending at as_of; returns (users, teams) scored."""
+    as_of = as_of or datetime.date.today().isoformat()
+    end = datetime.date.fromisoformat(as_of) + datetime.timedelta(days=1)
+    since = (end - datetime.timedelta(days=window)).isoformat()
+    with connection() as conn:
+        user_ids, days, stress = load(conn, since, end.isoformat())
+        assignments = conn.execute("SELECT id, team_id FROM users WHERE team_id IS NOT NULL").fetchall()
+    users, m = compute(user_ids, days, stress, window)
+    team_of = np.full(int(users.max(initial=0)) + 1, -1, dtype=np.int64)
+    for uid, tid in assignments:
+        if uid < len(team_of):
+            team_of[uid] = tid
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    user_rows = list(zip(users.tolist(), [t if t >= 0 else None for t in team_of[users].tolist()], [now] * len(users),
+                         m["entries"].tolist(), _nullable(m["avg_7d"]), _nullable(m["avg_28d"]),
+                         _nullable(m["slope"]), m["volatility"].tolist(), m["risk"].tolist()))
+    teams = team_rollup(users, m["risk"], team_of)
+    team_rows = [(t, now, n, avg, top, risky) for t, n, avg, top, risky in zip(*(a.tolist() for a in teams))]
+    write(_store, user_rows, team_rows)
+    return len(user_rows), len(team_rows)
+
+@reporting
+def get_scores(team_id=None, limit=50):
+    """Highest-risk users first, optionally within one team (manager view)."""
+    with connection() as conn:
+        if team_id is None:
+            return conn.execute("SELECT * FROM burnout_scores ORDER BY risk DESC LIMIT ?", (limit,)).fetchall()
+        return conn.execute("SELECT * FROM burnout_scores WHERE team_id=? ORDER BY risk DESC LIMIT ?",
+                            (team_id, limit)).fetchall()
+
+@reporting
+def get_team_scores():
+    with connection() as conn:
+        return conn.execute("SELECT * FROM team_burnout_scores ORDER BY avg_risk DESC").fetchall()
+
+if __name__ == "__main__":
+    args = dict(zip(sys.argv[1::2], sys.argv[2::2]))
+    init_db()
+    users, teams = refresh_scores(args.get("--as-of"), int(args.get("--window", WINDOW_DAYS)))
+    print(f"scored {users} users in {teams} teams")
+    for r in get_scores(limit=10):
+        print(f"user {r['user_id']:>7}  risk {r['risk']:5.1f}  7d {r['avg_7d'] or float('nan'):4.1f}  "
+              f"slope/wk {(r['slope'] or 0) * 7:+5.2f}  volatility {r['volatility']:4.2f}")
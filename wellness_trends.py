@@ -0,0 +1,50 @@
+from datetime import date
+from database import connection
+
+GRAINS = ("day", "week", "month")
+MAX_CHART_POINTS = 120
+
+def get_rollups(user_id, grain="day", since=None):
+    if grain not in GRAINS:
+        raise ValueError(f"Unknown grain {grain!r}")
+    q = "SELECT bucket, entries, stress_min, stress_max, 1.0*stress_sum/entries AS stress_avg FROM wellness_rollups WHERE user_id=? AND grain=?"
+    params = [user_id, grain]
+    if since:
+        q += " AND bucket>=?"
+        params.append(since)
+    with connection() as conn:
+        return conn.execute(q + " ORDER BY bucket", params).fetchall()
+
+def lttb(points, threshold):
+    """Largest-Triangle-Three-Buckets downsampling of (x, y) points sorted by x."""
+    n = len(points)
+    if threshold >= n or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # average of the next bucket is the third triangle vertex
+        nxt_start = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        nxt = points[nxt_start:nxt_end]
+        avg_x = sum(p[0] for p in nxt) / len(nxt)
+        avg_y = sum(p[1] for p in nxt) / len(nxt)
+        ax, ay = points[a]
+        best, best_area = None, -1.0
+        for j in range(int(i * every) + 1, nxt_start):
+            bx, by = points[j]
+            area = abs((ax - avg_x) * (by - ay) - (ax - bx) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+def stress_trend(user_id, max_points=MAX_CHART_POINTS):
+    """(labels, values) of daily average stress, downsampled to at most max_points."""
+    rows = get_rollups(user_id, "day")
+    points = [(date.fromisoformat(r['bucket']).toordinal(), r['stress_avg']) for r in rows]
+    points = lttb(points, max_points)
+    return [date.fromordinal(x).isoformat() for x, _ in points], [y for _, y in points]